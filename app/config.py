@@ -4,11 +4,27 @@
 
 import json
 import os
+import stat
+from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.models import ModLoader
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, используем stdlib json
+    orjson = None
+
+
+# Вычисляемые пути Settings, которые не сохраняются в config.json
+_COMPUTED_FIELDS = frozenset({
+    'mods_path', 'state_file_path', 'log_file_path',
+    'server_properties_file_path', 'server_logs_path', 'latest_log_path'
+})
+
 
 class Settings(BaseSettings):
     """Настройки приложения"""
@@ -17,8 +33,9 @@ class Settings(BaseSettings):
     minecraft_root_path: str = Field(default="/home/mc/server", description="Путь к корневой папке Minecraft сервера")
     enable_auto_update: bool = Field(default=True, description="Включить автообновления")
     update_interval: int = Field(default=2, description="Интервал проверки обновлений в часах")
+    update_concurrency: int = Field(default=4, description="Количество модов, проверяемых на обновления одновременно")
     server_properties_path: Optional[str] = Field(default=None, description="Путь к server.properties")
-    mod_loader: str = Field(default="fabric", description="Тип загрузчика модов")
+    mod_loader: ModLoader = Field(default=ModLoader.FABRIC, description="Тип загрузчика модов")
     
     # API настройки
     api_cache_ttl: int = Field(default=300, description="Время кэширования API запросов в секундах")
@@ -45,34 +62,34 @@ class Settings(BaseSettings):
         extra="ignore"
     )
     
-    @property
+    @cached_property
     def mods_path(self) -> Path:
         """Путь к папке модов"""
         return Path(self.minecraft_root_path) / "mods"
     
-    @property
+    @cached_property
     def state_file_path(self) -> Path:
         """Путь к файлу состояния"""
         return Path(self.minecraft_root_path) / self.state_file_name
     
-    @property
+    @cached_property
     def log_file_path(self) -> Path:
         """Путь к файлу логов"""
         return Path(self.minecraft_root_path) / self.log_file_name
     
-    @property
+    @cached_property
     def server_properties_file_path(self) -> Path:
         """Путь к файлу server.properties"""
         if self.server_properties_path:
             return Path(self.server_properties_path)
         return Path(self.minecraft_root_path) / "server.properties"
     
-    @property
+    @cached_property
     def server_logs_path(self) -> Path:
         """Путь к папке логов сервера"""
         return Path(self.minecraft_root_path) / "logs"
     
-    @property
+    @cached_property
     def latest_log_path(self) -> Path:
         """Путь к последнему логу сервера"""
         return self.server_logs_path / "latest.log"
@@ -84,59 +101,103 @@ class ConfigManager:
     def __init__(self, config_file: str = "config.json"):
         self.config_file = config_file
         self._settings: Optional[Settings] = None
+        self._config_mtime: Optional[int] = None
+        # Значения поверх config.json и окружения (например, аргументы командной строки)
+        self._overrides: Dict[str, Any] = {}
+        # Результаты validate_paths по (корневая папка, папка модов)
+        self._path_errors: Dict[Tuple[str, str], List[str]] = {}
+    
+    def _get_config_mtime(self) -> Optional[int]:
+        """Время изменения config.json (None если файла нет)"""
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def set_overrides(self, overrides: Dict[str, Any]) -> None:
+        """Задать значения настроек, которые имеют приоритет над config.json и окружением"""
+        self._overrides = dict(overrides)
+        self._settings = None
     
     def load_settings(self) -> Settings:
         """Загрузить настройки из файла и переменных окружения"""
-        if self._settings is not None:
+        # Файл заменяется атомарно при сохранении, поэтому неизменное mtime
+        # означает, что кэшированные настройки актуальны
+        if self._settings is not None and self._get_config_mtime() == self._config_mtime:
             return self._settings
         
         # Загружаем настройки из config.json если он существует
         config_data = {}
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Предупреждение: Не удалось загрузить {self.config_file}: {e}")
+        self._config_mtime = None
+        try:
+            with open(self.config_file, 'rb') as f:
+                self._config_mtime = os.fstat(f.fileno()).st_mtime_ns
+                raw = f.read()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+            # Берем только ключи верхнего уровня, известные Settings
+            if isinstance(data, dict):
+                config_data = {k: v for k, v in data.items() if k in Settings.model_fields}
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Предупреждение: Не удалось загрузить {self.config_file}: {e}")
         
         # Создаем настройки с приоритетом переменных окружения
-        self._settings = Settings(**config_data)
+        self._settings = Settings(**{**config_data, **self._overrides})
         return self._settings
     
     def save_settings(self, settings: Settings) -> None:
         """Сохранить настройки в файл"""
         try:
-            config_data = settings.model_dump(exclude={
-                'mods_path', 'state_file_path', 'log_file_path', 
-                'server_properties_file_path', 'server_logs_path', 'latest_log_path'
-            })
+            # Сериализуем напрямую в JSON, без промежуточного словаря
+            payload = settings.model_dump_json(indent=2, exclude=_COMPUTED_FIELDS).encode('utf-8')
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            # Пишем во временный файл и атомарно заменяем config.json,
+            # чтобы читатели никогда не видели частично записанный файл
+            tmp_file = f"{self.config_file}.tmp"
+            try:
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_file, self.config_file)
+            except IOError:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                raise
         except IOError as e:
             raise RuntimeError(f"Не удалось сохранить конфигурацию: {e}")
     
     def validate_paths(self, settings: Settings) -> list[str]:
-        """Проверить доступность путей"""
+        """Проверить доступность путей (результат кэшируется на время работы процесса)"""
+        key = (settings.minecraft_root_path, str(settings.mods_path))
+        errors = self._path_errors.get(key)
+        if errors is None:
+            errors = self._path_errors[key] = self._check_paths(settings)
+        return list(errors)
+    
+    def _check_paths(self, settings: Settings) -> List[str]:
+        """Проверить пути на файловой системе"""
         errors = []
         
-        # Проверяем корневую папку сервера
+        # Проверяем корневую папку сервера одним вызовом stat
         minecraft_path = Path(settings.minecraft_root_path)
-        if not minecraft_path.exists():
+        try:
+            root_stat = os.stat(minecraft_path)
+        except OSError:
+            root_stat = None
+        
+        if root_stat is None:
             errors.append(f"Корневая папка сервера не найдена: {minecraft_path}")
-        elif not minecraft_path.is_dir():
+        elif not stat.S_ISDIR(root_stat.st_mode):
             errors.append(f"Путь не является папкой: {minecraft_path}")
         
-        # Создаем папку модов если её нет
-        mods_path = settings.mods_path
-        if not mods_path.exists():
-            try:
-                mods_path.mkdir(parents=True, exist_ok=True)
-            except OSError as e:
-                errors.append(f"Не удалось создать папку модов: {e}")
+        # Создаем папку модов если её нет (exist_ok избавляет от отдельной проверки)
+        try:
+            settings.mods_path.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            errors.append(f"Не удалось создать папку модов: {e}")
         
         # Проверяем доступность для записи
-        if minecraft_path.exists() and not os.access(minecraft_path, os.W_OK):
+        if root_stat is not None and not os.access(minecraft_path, os.W_OK):
             errors.append(f"Нет прав на запись в папку сервера: {minecraft_path}")
         
         return errors
@@ -145,6 +206,14 @@ class ConfigManager:
 # Глобальный экземпляр менеджера конфигурации
 config_manager = ConfigManager()
 
-def get_settings() -> Settings:
-    """Получить настройки приложения"""
-    return config_manager.load_settings()
\ No newline at end of file
+def get_settings(overrides: Optional[Dict[str, Any]] = None) -> Settings:
+    """Получить настройки приложения
+    
+    Настройки кэшируются в config_manager и перечитываются только при
+    изменении config.json (проверка mtime). overrides применяются поверх
+    config.json и окружения и действуют для всех последующих вызовов
+    get_settings() в процессе.
+    """
+    if overrides:
+        config_manager.set_overrides(overrides)
+    return config_manager.load_settings()
@@ -4,35 +4,62 @@ FastAPI приложение для управления модами Minecraft
 
 import asyncio
 import logging
+import os
 import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Optional
 
 import httpx
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:  # ORJSONResponse требует orjson
+    DefaultResponse = JSONResponse
+
+try:
+    import uvloop  # noqa: F401
+    UVICORN_LOOP = "uvloop"
+except ImportError:  # uvloop недоступен (например, на Windows)
+    UVICORN_LOOP = "asyncio"
 
 from app.config import get_settings, Settings, config_manager
 from app.models import (
-    InstallRequest, InstallResponse, ErrorResponse, ModListResponse,
+    InstallRequest, InstallResponse, InstallBatchRequest, InstallBatchResponse,
+    ErrorResponse, ModListResponse,
     ServerInfo, AutoUpdateStatus, UpdateLogsResponse, HealthResponse,
-    ModInfo
+    ModInfo, UpdateResult
 )
 from app.mod_manager import ModManager, ModManagerError
 from app.updater import AutoUpdater
 from app.modrinth_api import ModrinthAPIError
 
 # Настройка логирования
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+}
+
+
 def setup_logging(settings: Settings):
     """Настройка системы логирования"""
-    log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
+    log_level = LOG_LEVELS.get(settings.log_level.upper(), logging.INFO)
+    
+    # Не собираем информацию о потоках и процессах для каждой записи
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
     
     # Создаем форматтер
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    formatter = logging.Formatter(LOG_FORMAT)
     
     # Настраиваем корневой логгер
     root_logger = logging.getLogger()
@@ -56,16 +83,23 @@ def setup_logging(settings: Settings):
 
 logger = logging.getLogger(__name__)
 
-# Глобальные переменные для менеджеров
-mod_manager: Optional[ModManager] = None
-auto_updater: Optional[AutoUpdater] = None
-app_start_time = time.time()
+app_start_time = time.monotonic()
+
+# Кэш результатов проверок для /health
+MODRINTH_HEALTH_TTL = 10.0
+MINECRAFT_HEALTH_TTL = 30.0
+_modrinth_health = {"ts": 0.0, "ok": False}
+_modrinth_health_lock = asyncio.Lock()
+_minecraft_health = {"ts": 0.0, "ok": False}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
-    global mod_manager, auto_updater
+    # Менеджеры и HTTP клиент хранятся в app.state
+    app.state.mod_manager = None
+    app.state.auto_updater = None
+    app.state.http_client = None
     
     # Инициализация при запуске
     try:
@@ -74,6 +108,13 @@ async def lifespan(app: FastAPI):
         
         logger.info("Запуск Minecraft Mod Manager")
         
+        # Общий HTTP клиент для проверок состояния (переиспользует соединения)
+        app.state.http_client = httpx.AsyncClient(
+            timeout=5.0,
+            limits=httpx.Limits(max_keepalive_connections=4),
+            http2=True
+        )
+        
         # Проверяем пути
         errors = config_manager.validate_paths(settings)
         if errors:
@@ -84,26 +125,32 @@ async def lifespan(app: FastAPI):
         # Инициализируем менеджер модов
         mod_manager = ModManager(settings)
         await mod_manager.initialize()
+        app.state.mod_manager = mod_manager
         
         # Инициализируем автообновлятор
         auto_updater = AutoUpdater(settings, mod_manager)
         await auto_updater.start()
+        app.state.auto_updater = auto_updater
         
         logger.info("Приложение успешно запущено")
         
     except Exception as e:
-        logger.error(f"Ошибка инициализации приложения: {e}")
+        logger.error("Ошибка инициализации приложения: %s", e)
         raise
     
     yield
     
     # Очистка при завершении
     try:
-        if auto_updater:
-            await auto_updater.stop()
+        if app.state.auto_updater:
+            await app.state.auto_updater.stop()
+        if app.state.mod_manager:
+            await app.state.mod_manager.close()
+        if app.state.http_client:
+            await app.state.http_client.aclose()
         logger.info("Приложение завершено")
     except Exception as e:
-        logger.error(f"Ошибка при завершении: {e}")
+        logger.error("Ошибка при завершении: %s", e)
 
 
 # Создание FastAPI приложения
@@ -111,7 +158,8 @@ app = FastAPI(
     title="Minecraft Mod Manager",
     description="API сервис для управления модами Minecraft через Modrinth",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultResponse
 )
 
 # Настройка CORS
@@ -124,63 +172,92 @@ app.add_middleware(
 )
 
 
-def get_mod_manager() -> ModManager:
-    """Получить экземпляр менеджера модов"""
-    if mod_manager is None:
-        raise HTTPException(status_code=503, detail="Менеджер модов не инициализирован")
-    return mod_manager
+def get_mod_manager(request: Request) -> ModManager:
+    """Получить экземпляр менеджера модов (привязан к app.state при запуске)"""
+    return request.app.state.mod_manager
 
 
-def get_auto_updater() -> AutoUpdater:
-    """Получить экземпляр автообновлятора"""
-    if auto_updater is None:
-        raise HTTPException(status_code=503, detail="Автообновлятор не инициализирован")
-    return auto_updater
+def get_auto_updater(request: Request) -> AutoUpdater:
+    """Получить экземпляр автообновлятора (привязан к app.state при запуске)"""
+    return request.app.state.auto_updater
 
 
 # Обработчики ошибок
+def error_content(message: str) -> dict:
+    """Тело ответа с ошибкой в формате ErrorResponse"""
+    return {"status": "error", "message": message, "details": None}
+
+
 @app.exception_handler(ModManagerError)
 async def mod_manager_error_handler(request, exc: ModManagerError):
     """Обработчик ошибок менеджера модов"""
-    logger.error(f"Ошибка менеджера модов: {exc}")
-    return JSONResponse(
+    logger.error("Ошибка менеджера модов: %s", exc)
+    return DefaultResponse(
         status_code=400,
-        content=ErrorResponse(message=str(exc)).model_dump()
+        content=error_content(str(exc))
     )
 
 
 @app.exception_handler(ModrinthAPIError)
 async def modrinth_api_error_handler(request, exc: ModrinthAPIError):
     """Обработчик ошибок Modrinth API"""
-    logger.error(f"Ошибка Modrinth API: {exc}")
-    return JSONResponse(
+    logger.error("Ошибка Modrinth API: %s", exc)
+    return DefaultResponse(
         status_code=502,
-        content=ErrorResponse(message=f"Ошибка API: {exc}").model_dump()
+        content=error_content(f"Ошибка API: {exc}")
     )
 
 
+async def check_modrinth_accessible(http_client: Optional[httpx.AsyncClient]) -> bool:
+    """Проверить доступность Modrinth API (результат кэшируется на MODRINTH_HEALTH_TTL секунд)"""
+    if time.monotonic() - _modrinth_health["ts"] < MODRINTH_HEALTH_TTL:
+        return _modrinth_health["ok"]
+    
+    # Одновременные проверки ждут один исходящий запрос
+    async with _modrinth_health_lock:
+        if time.monotonic() - _modrinth_health["ts"] < MODRINTH_HEALTH_TTL:
+            return _modrinth_health["ok"]
+        
+        accessible = False
+        try:
+            if http_client is not None:
+                response = await http_client.get("https://api.modrinth.com/v2/")
+                accessible = response.status_code == 200
+        except httpx.HTTPError:
+            pass
+        
+        _modrinth_health["ts"] = time.monotonic()
+        _modrinth_health["ok"] = accessible
+        return accessible
+
+
+async def check_minecraft_accessible(mod_manager: Optional[ModManager]) -> bool:
+    """Проверить доступность папки сервера (результат кэшируется на MINECRAFT_HEALTH_TTL секунд)"""
+    if mod_manager is None:
+        return False
+    
+    if time.monotonic() - _minecraft_health["ts"] < MINECRAFT_HEALTH_TTL:
+        return _minecraft_health["ok"]
+    
+    # stat выполняем вне event loop
+    accessible = await asyncio.to_thread(os.path.isdir, mod_manager.settings.minecraft_root_path)
+    
+    _minecraft_health["ts"] = time.monotonic()
+    _minecraft_health["ok"] = accessible
+    return accessible
+
+
 # Основные эндпоинты
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     """Проверка состояния сервиса"""
-    uptime = time.time() - app_start_time
-    
-    # Проверяем доступность Minecraft сервера
-    minecraft_accessible = False
-    try:
-        manager = get_mod_manager()
-        minecraft_accessible = manager.settings.minecraft_root_path.exists()
-    except:
-        pass
+    uptime = time.monotonic() - app_start_time
     
-    # Проверяем доступность Modrinth API
-    modrinth_accessible = False
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get("https://api.modrinth.com/v2/")
-            modrinth_accessible = response.status_code == 200
-    except:
-        pass
+    # Проверяем доступность Minecraft сервера и Modrinth API параллельно
+    minecraft_accessible, modrinth_accessible = await asyncio.gather(
+        check_minecraft_accessible(request.app.state.mod_manager),
+        check_modrinth_accessible(request.app.state.http_client)
+    )
     
     return HealthResponse(
         status="healthy",
@@ -198,7 +275,7 @@ async def install_mod(
 ):
     """Установить мод и его зависимости"""
     try:
-        logger.info(f"Запрос на установку мода: {request.mod}")
+        logger.info("Запрос на установку мода: %s", request.mod)
         
         response = await manager.install_mod(
             request.mod,
@@ -212,28 +289,81 @@ async def install_mod(
         return response
         
     except Exception as e:
-        logger.error(f"Ошибка установки мода: {e}")
+        logger.error("Ошибка установки мода: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/install/batch", response_model=InstallBatchResponse)
+async def install_mods_batch(
+    request: InstallBatchRequest,
+    manager: ModManager = Depends(get_mod_manager)
+):
+    """Установить несколько модов одним запросом"""
+    try:
+        logger.info("Запрос на пакетную установку модов: %s", ", ".join(item.mod for item in request.mods))
+        
+        # Зависимости разрешаются параллельно, а скачивание и запись в состояние
+        # ModManager выполняет по очереди (общие зависимости не скачиваются дважды)
+        responses = await asyncio.gather(*(
+            manager.install_mod(
+                item.mod,
+                force_update=item.force_update,
+                auto_update=item.auto_update
+            )
+            for item in request.mods
+        ))
+        
+        # Ошибка одного мода не прерывает установку остальных
+        results = [
+            InstallResponse(status="error", message=response.message)
+            if isinstance(response, ErrorResponse) else response
+            for response in responses
+        ]
+        
+        return InstallBatchResponse(results=results)
+        
+    except Exception as e:
+        logger.error("Ошибка пакетной установки модов: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/mods", response_model=ModListResponse)
-async def get_installed_mods(manager: ModManager = Depends(get_mod_manager)):
-    """Получить список установленных модов"""
+async def get_installed_mods(
+    limit: Optional[int] = Query(None, ge=0),
+    offset: int = Query(0, ge=0),
+    manager: ModManager = Depends(get_mod_manager)
+):
+    """Получить список установленных модов (limit/offset - постраничная выдача)"""
     try:
         mods = manager.get_installed_mods()
         
+        # total - общее число модов, независимо от выбранной страницы
+        page = mods[offset:offset + limit] if limit is not None else mods[offset:]
+        
         return ModListResponse(
-            mods=mods,
+            mods=page,
             total=len(mods),
             minecraft_version=manager.minecraft_version,
             mod_loader=manager.mod_loader
         )
         
     except Exception as e:
-        logger.error(f"Ошибка получения списка модов: {e}")
+        logger.error("Ошибка получения списка модов: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/mods/{mod_slug}", response_model=ModInfo)
+async def get_installed_mod(
+    mod_slug: str,
+    manager: ModManager = Depends(get_mod_manager)
+):
+    """Получить информацию об установленном моде"""
+    mod_info = manager.state_manager.get_mod(mod_slug)
+    if mod_info is None:
+        raise HTTPException(status_code=404, detail=f"Мод '{mod_slug}' не найден")
+    return mod_info
+
+
 @app.delete("/mods/{mod_slug}")
 async def remove_mod(
     mod_slug: str,
@@ -249,7 +379,7 @@ async def remove_mod(
         return {"status": "success", "message": f"Мод '{mod_slug}' удален"}
         
     except Exception as e:
-        logger.error(f"Ошибка удаления мода: {e}")
+        logger.error("Ошибка удаления мода: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -260,15 +390,23 @@ async def update_mod(
 ):
     """Обновить конкретный мод"""
     try:
-        success = await manager.update_mod(mod_slug)
+        result = await manager.update_mod(mod_slug)
         
-        if not success:
-            return {"status": "skipped", "message": f"Мод '{mod_slug}' уже актуален или не найден"}
+        if result == UpdateResult.NOT_FOUND:
+            raise HTTPException(status_code=404, detail=f"Мод '{mod_slug}' не найден")
+        if result == UpdateResult.FAILED:
+            return {"status": "error", "message": f"Не удалось обновить мод '{mod_slug}'"}
+        if result == UpdateResult.UP_TO_DATE:
+            return {"status": "skipped", "message": f"Мод '{mod_slug}' уже актуален"}
+        if result == UpdateResult.SKIPPED:
+            return {"status": "skipped", "message": f"Мод '{mod_slug}' недавно проверялся"}
         
         return {"status": "success", "message": f"Мод '{mod_slug}' обновлен"}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Ошибка обновления мода: {e}")
+        logger.error("Ошибка обновления мода: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -288,7 +426,7 @@ async def get_server_info(manager: ModManager = Depends(get_mod_manager)):
         )
         
     except Exception as e:
-        logger.error(f"Ошибка получения информации о сервере: {e}")
+        logger.error("Ошибка получения информации о сервере: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -308,7 +446,7 @@ async def get_auto_update_status(updater: AutoUpdater = Depends(get_auto_updater
         )
         
     except Exception as e:
-        logger.error(f"Ошибка получения статуса автообновления: {e}")
+        logger.error("Ошибка получения статуса автообновления: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -324,7 +462,7 @@ async def enable_auto_update(updater: AutoUpdater = Depends(get_auto_updater)):
         return result
         
     except Exception as e:
-        logger.error(f"Ошибка включения автообновления: {e}")
+        logger.error("Ошибка включения автообновления: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -340,7 +478,7 @@ async def disable_auto_update(updater: AutoUpdater = Depends(get_auto_updater)):
         return result
         
     except Exception as e:
-        logger.error(f"Ошибка отключения автообновления: {e}")
+        logger.error("Ошибка отключения автообновления: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -356,13 +494,13 @@ async def run_update_now(updater: AutoUpdater = Depends(get_auto_updater)):
         return result
         
     except Exception as e:
-        logger.error(f"Ошибка запуска обновления: {e}")
+        logger.error("Ошибка запуска обновления: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/auto-update/logs", response_model=UpdateLogsResponse)
 async def get_update_logs(
-    limit: Optional[int] = 50,
+    limit: Optional[int] = Query(50, ge=0),
     updater: AutoUpdater = Depends(get_auto_updater)
 ):
     """Получить логи обновлений"""
@@ -375,7 +513,7 @@ async def get_update_logs(
         )
         
     except Exception as e:
-        logger.error(f"Ошибка получения логов: {e}")
+        logger.error("Ошибка получения логов: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -387,7 +525,7 @@ async def clear_update_logs(updater: AutoUpdater = Depends(get_auto_updater)):
         return {"status": "success", "message": "Логи очищены"}
         
     except Exception as e:
-        logger.error(f"Ошибка очистки логов: {e}")
+        logger.error("Ошибка очистки логов: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -400,5 +538,6 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=False,
-        log_level=settings.log_level.lower()
+        log_level=settings.log_level.lower(),
+        loop=UVICORN_LOOP
     )
\ No newline at end of file
@@ -3,21 +3,58 @@
 """
 
 import asyncio
+import fnmatch
 import json
 import os
 import re
 import shutil
+import threading
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
 import logging
 
+from pydantic import TypeAdapter
+
 from app.config import Settings
-from app.models import ModInfo, ModLoader, InstallResponse, ErrorResponse
+from app.models import ModInfo, ModLoader, InstallResponse, ErrorResponse, UpdateResult
 from app.modrinth_api import ModrinthClient, ModrinthAPIError
 
+try:
+    import orjson
+except ImportError:  # orjson необязателен, используем stdlib json
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Валидатор списка модов (разбирает весь список в pydantic-core за один вызов)
+_MOD_LIST_ADAPTER = TypeAdapter(List[ModInfo])
+
+# Строка version= или minecraft-version= в server.properties
+_PROPERTIES_VERSION_RE = re.compile(rb'^[ \t]*(?:minecraft-)?version=[ \t]*(\S+)', re.MULTILINE)
+
+# Файлы в корне сервера, по которым определяется загрузчик
+_FABRIC_FILES_RE = re.compile('|'.join(fnmatch.translate(p) for p in (
+    'fabric-server-mc.*.jar',
+    'fabric-loader-*.jar',
+)))
+_FORGE_FILES_RE = re.compile('|'.join(fnmatch.translate(p) for p in (
+    'forge-*.jar',
+    'minecraft_server.*.jar',
+)))
+
+# Сколько байт с конца latest.log читать при поиске версии
+_LOG_TAIL_BYTES = 64 * 1024
+
+# Паттерн версии Minecraft в логах сервера (все варианты в одном регулярном выражении)
+_LOG_VERSION_RE = re.compile(
+    r'(?:Starting minecraft server version |Loading Minecraft |minecraft.*?)(\d+\.\d+(?:\.\d+)?)',
+    re.IGNORECASE
+)
+
 
 class ModManagerError(Exception):
     """Ошибка менеджера модов"""
@@ -29,9 +66,30 @@ class ServerInfoReader:
     
     def __init__(self, settings: Settings):
         self.settings = settings
+        # (mtime server.properties, mtime latest.log, версия)
+        self._version_cache: Optional[Tuple[Optional[int], Optional[int], Optional[str]]] = None
+    
+    @staticmethod
+    def _get_mtime(path: Path) -> Optional[int]:
+        """Время изменения файла (None если файла нет)"""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
     
     def read_minecraft_version(self) -> Optional[str]:
-        """Определить версию Minecraft сервера"""
+        """Определить версию Minecraft сервера (кэшируется до изменения файлов)"""
+        properties_mtime = self._get_mtime(self.settings.server_properties_file_path)
+        log_mtime = self._get_mtime(self.settings.latest_log_path)
+        if self._version_cache and self._version_cache[:2] == (properties_mtime, log_mtime):
+            return self._version_cache[2]
+        
+        version = self._detect_minecraft_version()
+        self._version_cache = (properties_mtime, log_mtime, version)
+        return version
+    
+    def _detect_minecraft_version(self) -> Optional[str]:
+        """Прочитать версию Minecraft из файлов сервера"""
         # Сначала пробуем прочитать из server.properties
         version = self._read_version_from_properties()
         if version:
@@ -54,14 +112,12 @@ class ServerInfoReader:
             return None
         
         try:
-            with open(properties_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('version=') or line.startswith('minecraft-version='):
-                        version = line.split('=', 1)[1].strip()
-                        if version:
-                            logger.info(f"Версия из server.properties: {version}")
-                            return version
+            # Файл небольшой: читаем целиком и ищем версию одним регулярным выражением
+            match = _PROPERTIES_VERSION_RE.search(properties_file.read_bytes())
+            if match:
+                version = match.group(1).decode('utf-8')
+                logger.info(f"Версия из server.properties: {version}")
+                return version
         except Exception as e:
             logger.error(f"Ошибка чтения server.properties: {e}")
         
@@ -76,24 +132,29 @@ class ServerInfoReader:
             return None
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                # Читаем последние 100 строк для поиска версии
-                lines = f.readlines()[-100:]
+            # Читаем только хвост файла: логи сервера могут весить сотни мегабайт
+            with open(log_file, 'rb') as f:
+                start = max(0, f.seek(0, os.SEEK_END) - _LOG_TAIL_BYTES)
+                f.seek(start)
+                tail = f.read().decode('utf-8', 'replace')
+            
+            lines = tail.splitlines()
+            if start > 0:
+                # Первая строка могла быть обрезана
+                lines = lines[1:]
+            
+            # Ищем версию в последних 100 строках
+            for line in reversed(lines[-100:]):
+                # Быстро отсекаем строки без упоминания Minecraft
+                if 'minecraft' not in line.lower():
+                    continue
                 
-                for line in reversed(lines):
-                    # Ищем паттерны версии в логах
-                    patterns = [
-                        r'Starting minecraft server version (\d+\.\d+(?:\.\d+)?)',
-                        r'Loading Minecraft (\d+\.\d+(?:\.\d+)?)',
-                        r'minecraft.*?(\d+\.\d+(?:\.\d+)?)',
-                    ]
-                    
-                    for pattern in patterns:
-                        match = re.search(pattern, line, re.IGNORECASE)
-                        if match:
-                            version = match.group(1)
-                            logger.info(f"Версия из логов: {version}")
-                            return version
+                # Ищем паттерн версии в логах
+                match = _LOG_VERSION_RE.search(line)
+                if match:
+                    version = match.group(1)
+                    logger.info(f"Версия из логов: {version}")
+                    return version
         except Exception as e:
             logger.error(f"Ошибка чтения логов: {e}")
         
@@ -103,33 +164,27 @@ class ServerInfoReader:
         """Определить тип загрузчика модов"""
         minecraft_path = Path(self.settings.minecraft_root_path)
         
-        # Проверяем наличие файлов Fabric
-        fabric_files = [
-            'fabric-server-mc.*.jar',
-            'fabric-loader-*.jar',
-            '.fabric'
-        ]
+        # Получаем содержимое корневой папки за один проход
+        try:
+            with os.scandir(minecraft_path) as entries:
+                names = [entry.name for entry in entries]
+        except OSError:
+            names = []
         
-        for pattern in fabric_files:
-            if list(minecraft_path.glob(pattern)):
-                logger.info("Обнаружен Fabric загрузчик")
-                return ModLoader.FABRIC
+        # Проверяем наличие файлов Fabric
+        if '.fabric' in names or any(_FABRIC_FILES_RE.match(name) for name in names):
+            logger.info("Обнаружен Fabric загрузчик")
+            return ModLoader.FABRIC
         
         # Проверяем наличие файлов Forge
-        forge_files = [
-            'forge-*.jar',
-            'minecraft_server.*.jar',
-            'libraries/net/minecraftforge'
-        ]
-        
-        for pattern in forge_files:
-            if list(minecraft_path.glob(pattern)):
-                logger.info("Обнаружен Forge загрузчик")
-                return ModLoader.FORGE
+        if (any(_FORGE_FILES_RE.match(name) for name in names)
+                or (minecraft_path / 'libraries' / 'net' / 'minecraftforge').exists()):
+            logger.info("Обнаружен Forge загрузчик")
+            return ModLoader.FORGE
         
         # По умолчанию возвращаем из настроек
-        logger.info(f"Загрузчик не определен, используем из настроек: {self.settings.mod_loader}")
-        return ModLoader(self.settings.mod_loader)
+        logger.info(f"Загрузчик не определен, используем из настроек: {self.settings.mod_loader.value}")
+        return self.settings.mod_loader
 
 
 class StateManager:
@@ -139,6 +194,16 @@ class StateManager:
         self.settings = settings
         self.state_file = settings.state_file_path
         self._state: Dict[str, Dict] = {}
+        # Кэш распарсенных ModInfo по slug
+        self._mod_cache: Dict[str, ModInfo] = {}
+        # Отложенное сохранение внутри batch_async()
+        self._batch_depth = 0
+        self._dirty = False
+        # Запись на диск может идти из потока: сериализуем записи и не даем
+        # более старому состоянию перезаписать более новое
+        self._write_lock = threading.Lock()
+        self._save_seq = 0
+        self._written_seq = 0
         self._load_state()
     
     def _load_state(self):
@@ -156,8 +221,9 @@ class StateManager:
             return
         
         try:
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                self._state = json.load(f)
+            with open(self.state_file, 'rb') as f:
+                raw = f.read()
+            self._state = orjson.loads(raw) if orjson else json.loads(raw)
             
             # Проверяем структуру
             if 'mods' not in self._state:
@@ -173,10 +239,7 @@ class StateManager:
         except Exception as e:
             logger.error(f"Ошибка загрузки состояния: {e}")
             # Создаем резервную копию поврежденного файла
-            if self.state_file.exists():
-                backup_path = self.state_file.with_suffix('.json.backup')
-                shutil.copy2(self.state_file, backup_path)
-                logger.info(f"Создана резервная копия: {backup_path}")
+            self._backup_state_file()
             
             # Инициализируем пустое состояние
             self._state = {
@@ -186,63 +249,156 @@ class StateManager:
                     'version': '1.0.0'
                 }
             }
+            return
+        
+        # Резервную копию делаем один раз при запуске, а не при каждом сохранении
+        if self.settings.backup_state:
+            self._backup_state_file()
+    
+    def _backup_state_file(self):
+        """Скопировать файл состояния в .json.backup (ошибка копирования не критична)"""
+        backup_path = self.state_file.with_suffix('.json.backup')
+        try:
+            shutil.copy2(self.state_file, backup_path)
+            logger.info(f"Создана резервная копия: {backup_path}")
+        except OSError as e:
+            logger.warning(f"Не удалось создать резервную копию состояния {backup_path}: {e}")
+    
+    def _serialize_state(self) -> Tuple[bytes, int]:
+        """Сериализовать состояние и получить порядковый номер сохранения"""
+        # Обновляем метаданные
+        self._state['metadata']['updated_at'] = datetime.now().isoformat()
+        
+        if orjson:
+            payload = orjson.dumps(self._state, option=orjson.OPT_INDENT_2, default=str)
+        else:
+            payload = json.dumps(self._state, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+        
+        self._save_seq += 1
+        return payload, self._save_seq
+    
+    def _write_state(self, payload: bytes, seq: int):
+        """Записать сериализованное состояние на диск (может выполняться в потоке)"""
+        with self._write_lock:
+            # Более новое состояние уже записано другим сохранением
+            if seq <= self._written_seq:
+                return
+            
+            # Пишем во временный файл и атомарно заменяем файл состояния
+            tmp_file = self.state_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.state_file)
+            self._written_seq = seq
     
     def _save_state(self):
         """Сохранить состояние в файл"""
         try:
-            # Создаем резервную копию если включено
-            if self.settings.backup_state and self.state_file.exists():
-                backup_path = self.state_file.with_suffix('.json.backup')
-                shutil.copy2(self.state_file, backup_path)
-            
-            # Обновляем метаданные
-            self._state['metadata']['updated_at'] = datetime.now().isoformat()
-            
-            # Сохраняем состояние
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(self._state, f, indent=2, ensure_ascii=False, default=str)
-            
+            self._write_state(*self._serialize_state())
+            logger.debug("Состояние сохранено")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения состояния: {e}")
+            raise ModManagerError(f"Не удалось сохранить состояние: {e}")
+    
+    async def _save_state_async(self):
+        """Сохранить состояние в файл, не блокируя event loop"""
+        try:
+            # Сериализуем в текущем потоке, чтобы состояние не менялось во время обхода
+            payload, seq = self._serialize_state()
+            await asyncio.to_thread(self._write_state, payload, seq)
             logger.debug("Состояние сохранено")
-            
         except Exception as e:
             logger.error(f"Ошибка сохранения состояния: {e}")
             raise ModManagerError(f"Не удалось сохранить состояние: {e}")
     
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        """Метаданные состояния (только для чтения)"""
+        return MappingProxyType(self._state['metadata'])
+    
+    def set_metadata(self, key: str, value: Any):
+        """Изменить значение метаданных состояния"""
+        self._state['metadata'][key] = value
+        self._save_or_defer()
+    
+    def _save_or_defer(self):
+        """Сохранить состояние или отложить сохранение до конца batch_async()"""
+        if self._batch_depth:
+            self._dirty = True
+        else:
+            self._save_state()
+    
+    @asynccontextmanager
+    async def batch_async(self):
+        """Объединить несколько изменений состояния в одну запись на диск
+        
+        Итоговая запись выполняется в отдельном потоке. Внутри блока не должно быть
+        await: счетчик общий для процесса и иначе задержал бы чужие записи.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._dirty:
+                self._dirty = False
+                await self._save_state_async()
+    
     def add_mod(self, mod_info: ModInfo):
         """Добавить мод в состояние"""
-        self._state['mods'][mod_info.slug] = mod_info.model_dump()
-        self._save_state()
+        # Храним JSON-совместимое представление: при сохранении его не нужно преобразовывать
+        self._state['mods'][mod_info.slug] = mod_info.model_dump(mode='json')
+        self._mod_cache[mod_info.slug] = mod_info
+        self._save_or_defer()
         logger.info(f"Мод добавлен в состояние: {mod_info.slug}")
     
     def remove_mod(self, slug: str):
         """Удалить мод из состояния"""
         if slug in self._state['mods']:
             del self._state['mods'][slug]
-            self._save_state()
+            self._mod_cache.pop(slug, None)
+            self._save_or_defer()
             logger.info(f"Мод удален из состояния: {slug}")
     
     def get_mod(self, slug: str) -> Optional[ModInfo]:
         """Получить информацию о моде"""
+        mod_info = self._mod_cache.get(slug)
+        if mod_info is not None:
+            return mod_info
+        
         mod_data = self._state['mods'].get(slug)
         if mod_data:
-            return ModInfo(**mod_data)
+            mod_info = ModInfo(**mod_data)
+            self._mod_cache[slug] = mod_info
+            return mod_info
         return None
     
     def get_all_mods(self) -> List[ModInfo]:
         """Получить все установленные моды"""
-        mods = []
-        for mod_data in self._state['mods'].values():
+        # Парсим за один вызов все моды, которых еще нет в кэше
+        missing = [slug for slug in self._state['mods'] if slug not in self._mod_cache]
+        if missing:
             try:
-                mods.append(ModInfo(**mod_data))
-            except Exception as e:
-                logger.error(f"Ошибка парсинга мода: {e}")
-        return mods
+                parsed = _MOD_LIST_ADAPTER.validate_python([self._state['mods'][slug] for slug in missing])
+                self._mod_cache.update(zip(missing, parsed))
+            except Exception:
+                # Парсим по одному, чтобы пропустить только поврежденные записи
+                for slug in missing:
+                    try:
+                        self._mod_cache[slug] = ModInfo(**self._state['mods'][slug])
+                    except Exception as e:
+                        logger.error(f"Ошибка парсинга мода: {e}")
+        
+        return [self._mod_cache[slug] for slug in self._state['mods'] if slug in self._mod_cache]
     
     def update_mod(self, slug: str, **kwargs):
         """Обновить информацию о моде"""
         if slug in self._state['mods']:
             self._state['mods'][slug].update(kwargs)
-            self._save_state()
+            self._mod_cache.pop(slug, None)
+            self._save_or_defer()
 
 
 class ModManager:
@@ -252,8 +408,22 @@ class ModManager:
         self.settings = settings
         self.server_info = ServerInfoReader(settings)
         self.state_manager = StateManager(settings)
+        # Клиент Modrinth живет все время работы менеджера и переиспользует соединения
+        self.modrinth_client = ModrinthClient(
+            self.settings.api_cache_ttl,
+            retry_attempts=self.settings.retry_attempts
+        )
         self._minecraft_version: Optional[str] = None
         self._mod_loader: Optional[ModLoader] = None
+        self._mod_loader_value: Optional[str] = None
+        # Время последней проверки обновлений по slug (time.monotonic())
+        self._update_check_ts: Dict[str, float] = {}
+        # Установки (в том числе из /install/batch и автообновления) могут разрешать
+        # зависимости параллельно, но планирование, скачивание и запись в состояние
+        # выполняются по очереди, чтобы общий мод не скачивался в один файл дважды
+        self._install_lock = asyncio.Lock()
+        # Общий на весь менеджер лимит одновременных загрузок
+        self._download_semaphore = asyncio.Semaphore(max(1, self.settings.max_concurrent_downloads))
     
     async def initialize(self):
         """Инициализация менеджера"""
@@ -264,11 +434,18 @@ class ModManager:
         
         # Определяем загрузчик модов
         self._mod_loader = self.server_info.detect_mod_loader()
+        self._mod_loader_value = self._mod_loader.value
         
         # Создаем папку модов если её нет
         self.settings.mods_path.mkdir(parents=True, exist_ok=True)
         
-        logger.info(f"Менеджер инициализирован: Minecraft {self._minecraft_version}, {self._mod_loader.value}")
+        await self.modrinth_client.start()
+        
+        logger.info(f"Менеджер инициализирован: Minecraft {self._minecraft_version}, {self._mod_loader_value}")
+    
+    async def close(self):
+        """Освободить ресурсы менеджера"""
+        await self.modrinth_client.close()
     
     @property
     def minecraft_version(self) -> str:
@@ -315,18 +492,23 @@ class ModManager:
         skipped = []
         
         try:
-            async with ModrinthClient(self.settings.api_cache_ttl) as client:
-                # Разрешаем зависимости
-                dependencies = await client.resolve_dependencies(
-                    mod_slug, self.minecraft_version, self.mod_loader
+            client = self.modrinth_client
+            
+            # Разрешаем зависимости
+            dependencies = await client.resolve_dependencies(
+                mod_slug, self.minecraft_version, self.mod_loader
+            )
+            
+            if not dependencies:
+                return ErrorResponse(
+                    message=f"Не найдено совместимых версий для мода '{mod_slug}' с Minecraft {self.minecraft_version}"
                 )
-                
-                if not dependencies:
-                    return ErrorResponse(
-                        message=f"Не найдено совместимых версий для мода '{mod_slug}' с Minecraft {self.minecraft_version}"
-                    )
-                
-                # Устанавливаем каждую зависимость
+            
+            # Планирование, скачивание и запись выполняются под общей блокировкой:
+            # параллельная установка увидит уже установленные общие зависимости
+            async with self._install_lock:
+                # Определяем, какие зависимости нужно скачать
+                to_download = []
                 for dep in dependencies:
                     project = dep['project']
                     version = dep['version']
@@ -346,49 +528,81 @@ class ModManager:
                             logger.info(f"Мод {slug} уже установлен и актуален")
                             continue
                     
-                    # Удаляем старую версию если есть
+                    # Старую версию удаляем только после успешной загрузки новой
                     if self._is_mod_installed(slug):
-                        self._remove_old_mod_file(slug)
                         updated.append(slug)
                     else:
                         installed.append(slug)
                     
-                    # Скачиваем файл
-                    filename = file_info['filename']
-                    file_path = self._get_mod_file_path(filename)
-                    
-                    success = await client.download_file(file_info, str(file_path))
-                    if not success:
-                        raise ModManagerError(f"Не удалось скачать файл: {filename}")
-                    
-                    # Создаем информацию о моде
-                    mod_info = ModInfo(
-                        slug=slug,
-                        name=project['title'],
-                        version=version['version_number'],
-                        file_name=filename,
-                        installed_at=datetime.now(),
-                        auto_update=auto_update,
-                        dependencies=[d['project']['slug'] for d in dependencies if d['project']['slug'] != slug],
-                        minecraft_versions=version['game_versions'],
-                        mod_loader=self.mod_loader,
-                        project_id=project['id'],
-                        version_id=version['id'],
-                        file_size=file_info.get('size', 0)
-                    )
-                    
-                    # Сохраняем в состояние
-                    self.state_manager.add_mod(mod_info)
-                    
-                    logger.info(f"Мод установлен: {slug} v{version['version_number']}")
+                    to_download.append(dep)
                 
-                return InstallResponse(
-                    status="success",
-                    installed=installed,
-                    updated=updated,
-                    skipped=skipped
-                )
+                # Скачиваем файлы параллельно, ограничивая число одновременных загрузок
+                async def download(dep: Dict) -> bool:
+                    file_info = dep['file']
+                    mod_file = self._get_mod_file_path(file_info['filename'])
+                    # Скачиваем во временный файл: при ошибке текущий файл мода не трогаем
+                    part_file = mod_file.with_name(mod_file.name + '.part')
+                    async with self._download_semaphore:
+                        success = await client.download_file(file_info, str(part_file))
+                    if success:
+                        os.replace(part_file, mod_file)
+                    else:
+                        part_file.unlink(missing_ok=True)
+                    return success
+                
+                results = await asyncio.gather(*(download(dep) for dep in to_download))
                 
+                # Сохраняем в состояние только успешно скачанные моды (одной записью на диск)
+                failed = []
+                installed_at = datetime.now()
+                all_slugs = [d['project']['slug'] for d in dependencies]
+                async with self.state_manager.batch_async():
+                    for dep, success in zip(to_download, results):
+                        project = dep['project']
+                        version = dep['version']
+                        file_info = dep['file']
+                        slug = project['slug']
+                        filename = file_info['filename']
+                        
+                        if not success:
+                            failed.append(filename)
+                            continue
+                        
+                        # Новый файл уже на месте - удаляем старый, если у него другое имя
+                        existing_mod = self.state_manager.get_mod(slug)
+                        if existing_mod and existing_mod.file_name != filename:
+                            self._remove_old_mod_file(slug)
+                        
+                        # Создаем информацию о моде
+                        mod_info = ModInfo(
+                            slug=slug,
+                            name=project['title'],
+                            version=version['version_number'],
+                            file_name=filename,
+                            installed_at=installed_at,
+                            auto_update=auto_update,
+                            dependencies=[s for s in all_slugs if s != slug],
+                            minecraft_versions=version['game_versions'],
+                            mod_loader=self.mod_loader,
+                            project_id=project['id'],
+                            version_id=version['id'],
+                            file_size=file_info.get('size', 0)
+                        )
+                        
+                        self.state_manager.add_mod(mod_info)
+                        
+                        logger.info(f"Мод установлен: {slug} v{version['version_number']}")
+            
+            if failed:
+                raise ModManagerError(f"Не удалось скачать файл: {', '.join(failed)}")
+            
+            return InstallResponse(
+                status="success",
+                installed=installed,
+                updated=updated,
+                skipped=skipped
+            )
+            
         except ModrinthAPIError as e:
             logger.error(f"Ошибка API при установке мода: {e}")
             return ErrorResponse(message=str(e))
@@ -396,44 +610,60 @@ class ModManager:
             logger.error(f"Ошибка установки мода: {e}")
             return ErrorResponse(message=f"Ошибка установки: {e}")
     
-    async def update_mod(self, slug: str) -> bool:
-        """Обновить конкретный мод"""
+    async def update_mod(self, slug: str) -> UpdateResult:
+        """Обновить конкретный мод
+        
+        Время проверки запоминается только после успешной проверки, поэтому
+        неудачное обновление повторяется при следующем вызове.
+        """
         mod_info = self.state_manager.get_mod(slug)
         if not mod_info:
             logger.warning(f"Мод не найден в состоянии: {slug}")
-            return False
+            return UpdateResult.NOT_FOUND
+        
+        # Не обращаемся к API, если мод уже проверялся в пределах api_cache_ttl
+        last_check = self._update_check_ts.get(slug)
+        if last_check is not None and time.monotonic() - last_check < self.settings.api_cache_ttl:
+            logger.debug(f"Мод {slug} недавно проверялся, пропускаем")
+            return UpdateResult.SKIPPED
         
         try:
-            async with ModrinthClient(self.settings.api_cache_ttl) as client:
-                # Получаем последние версии
-                versions = await client.get_project_versions(
-                    slug,
-                    game_versions=[self.minecraft_version],
-                    loaders=[self.mod_loader.value]
-                )
-                
-                compatible_versions = client.filter_compatible_versions(
-                    versions, self.minecraft_version, self.mod_loader
-                )
-                
-                if not compatible_versions:
-                    logger.warning(f"Нет совместимых версий для обновления: {slug}")
-                    return False
-                
-                latest_version = compatible_versions[0]
-                
-                # Проверяем, нужно ли обновление
-                if latest_version['version_number'] == mod_info.version:
-                    logger.info(f"Мод {slug} уже актуален")
-                    return False
-                
-                # Обновляем мод
-                response = await self.install_mod(slug, force_update=True, auto_update=mod_info.auto_update)
-                return response.status == "success"
-                
+            client = self.modrinth_client
+            
+            # Получаем последние версии
+            versions = await client.get_project_versions(
+                slug,
+                game_versions=[self.minecraft_version],
+                loaders=[self._mod_loader_value]
+            )
+            
+            compatible_versions = client.filter_compatible_versions(
+                versions, self.minecraft_version, self.mod_loader, slug=slug
+            )
+            
+            if not compatible_versions:
+                logger.warning(f"Нет совместимых версий для обновления: {slug}")
+                return UpdateResult.FAILED
+            
+            latest_version = compatible_versions[0]
+            
+            # Проверяем, нужно ли обновление
+            if latest_version['version_number'] == mod_info.version:
+                logger.info(f"Мод {slug} уже актуален")
+                self._update_check_ts[slug] = time.monotonic()
+                return UpdateResult.UP_TO_DATE
+            
+            # Обновляем мод
+            response = await self.install_mod(slug, force_update=True, auto_update=mod_info.auto_update)
+            if response.status != "success":
+                return UpdateResult.FAILED
+            
+            self._update_check_ts[slug] = time.monotonic()
+            return UpdateResult.UPDATED
+            
         except Exception as e:
             logger.error(f"Ошибка обновления мода {slug}: {e}")
-            return False
+            return UpdateResult.FAILED
     
     def remove_mod(self, slug: str) -> bool:
         """Удалить мод"""
@@ -468,9 +698,9 @@ class ModManager:
         
         return {
             'minecraft_version': self.minecraft_version,
-            'mod_loader': self.mod_loader.value,
+            'mod_loader': self._mod_loader_value,
             'server_path': str(self.settings.minecraft_root_path),
             'mods_count': len(mods),
             'auto_update_enabled': self.settings.enable_auto_update,
-            'last_update_check': self.state_manager._state['metadata'].get('last_update_check')
+            'last_update_check': self.state_manager.metadata.get('last_update_check')
         }
\ No newline at end of file
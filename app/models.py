@@ -4,7 +4,7 @@ Pydantic модели для API запросов и ответов
 
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -21,6 +21,15 @@ class VersionType(str, Enum):
     ALPHA = "alpha"
 
 
+class UpdateResult(str, Enum):
+    """Результат обновления одного мода"""
+    UPDATED = "updated"
+    UP_TO_DATE = "up_to_date"
+    SKIPPED = "skipped"
+    NOT_FOUND = "not_found"
+    FAILED = "failed"
+
+
 class InstallRequest(BaseModel):
     """Запрос на установку мода"""
     mod: str = Field(..., description="Название мода или ссылка на Modrinth")
@@ -30,6 +39,8 @@ class InstallRequest(BaseModel):
 
 class ModInfo(BaseModel):
     """Информация об установленном моде"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     slug: str
     name: str
     version: str
@@ -46,6 +57,8 @@ class ModInfo(BaseModel):
 
 class InstallResponse(BaseModel):
     """Ответ на запрос установки"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     status: str
     installed: List[str] = Field(default_factory=list)
     updated: List[str] = Field(default_factory=list)
@@ -53,6 +66,18 @@ class InstallResponse(BaseModel):
     message: Optional[str] = None
 
 
+class InstallBatchRequest(BaseModel):
+    """Запрос на установку нескольких модов"""
+    mods: List[InstallRequest] = Field(..., min_length=1, description="Моды для установки")
+
+
+class InstallBatchResponse(BaseModel):
+    """Ответ на пакетную установку (результаты в порядке запроса)"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
+    results: List[InstallResponse]
+
+
 class ErrorResponse(BaseModel):
     """Ответ с ошибкой"""
     status: str = "error"
@@ -62,6 +87,8 @@ class ErrorResponse(BaseModel):
 
 class ModListResponse(BaseModel):
     """Список установленных модов"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     mods: List[ModInfo]
     total: int
     minecraft_version: Optional[str] = None
@@ -70,6 +97,8 @@ class ModListResponse(BaseModel):
 
 class ServerInfo(BaseModel):
     """Информация о сервере"""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     minecraft_version: str
     mod_loader: ModLoader
     server_path: str
@@ -3,57 +3,135 @@
 """
 
 import asyncio
+import hashlib
+import json
+import os
 import re
-from datetime import datetime, timedelta
+import time
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, List, Optional, Tuple, Any
-from urllib.parse import urlparse
+import aiofiles
 import httpx
+from cachetools import LRUCache, TTLCache
 from app.models import ModLoader, VersionType
 import logging
 
+try:
+    import orjson
+except ImportError:  # orjson необязателен, используем stdlib json
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Ключ кэша ответов API: (endpoint, отсортированные параметры запроса)
+CacheKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def _dumps_param(value: Any) -> str:
+    """Сериализовать значение query-параметра в JSON строку"""
+    if orjson:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value)
+
+
+def _loads(content: bytes) -> Any:
+    """Разобрать JSON ответа API"""
+    if orjson:
+        return orjson.loads(content)
+    return json.loads(content)
+
 
 class ModrinthAPIError(Exception):
     """Ошибка при работе с Modrinth API"""
     pass
 
 
+# Приоритет типов версий: release > beta > alpha
+_VERSION_PRIORITY = {'release': 0, 'beta': 1, 'alpha': 2}
+
+# Ссылка на страницу мода: https://modrinth.com/mod/<slug>[/...][?...]
+_MOD_URL_RE = re.compile(r'^https?://(?:[\w-]+\.)*modrinth\.com/mod/([^/?#\s]+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def _extract_slug(url_or_slug: str) -> str:
+    """Извлечь slug из URL или вернуть как есть (результат кэшируется)"""
+    url_or_slug = url_or_slug.strip()
+    
+    # Если это уже slug (без протокола и доменов)
+    if not url_or_slug.startswith(('http://', 'https://')):
+        return url_or_slug
+    
+    match = _MOD_URL_RE.match(url_or_slug)
+    if match:
+        return match.group(1)
+    
+    raise ModrinthAPIError(f"Не удалось извлечь slug из URL: {url_or_slug}")
+
+
 class ModrinthClient:
     """Асинхронный клиент для Modrinth API"""
     
     BASE_URL = "https://api.modrinth.com/v2"
+    MAX_RETRY_DELAY = 60.0
+    DOWNLOAD_CHUNK_SIZE = 1 << 16  # 64 KiB
+    CACHE_MAXSIZE = 2048
+    THREADED_PARSE_THRESHOLD = 1 << 16  # 64 KiB
+    USER_AGENT = "MinecraftModManager/1.0.0 (https://github.com/user/minecraft-mod-manager)"
     
-    def __init__(self, cache_ttl: int = 300):
+    def __init__(self, cache_ttl: int = 300, max_concurrent_requests: int = 8,
+                 retry_attempts: int = 3, http_client: Optional[httpx.AsyncClient] = None):
         self.cache_ttl = cache_ttl
-        self._cache: Dict[str, Tuple[datetime, Any]] = {}
-        self._client: Optional[httpx.AsyncClient] = None
+        self.retry_attempts = max(retry_attempts, 0)
+        # Свежие ответы живут cache_ttl секунд по монотонным часам; размер кэша ограничен
+        self._cache: TTLCache = TTLCache(maxsize=self.CACHE_MAXSIZE, ttl=cache_ttl, timer=time.monotonic)
+        # ETag и данные устаревших ответов для условных запросов (If-None-Match)
+        self._etags: LRUCache = LRUCache(maxsize=self.CACHE_MAXSIZE)
+        # Отфильтрованные совместимые версии по (slug, версия MC, загрузчик, ...)
+        self._compat_cache: TTLCache = TTLCache(maxsize=self.CACHE_MAXSIZE, ttl=cache_ttl, timer=time.monotonic)
+        # project_id -> slug для проектов, уже полученных из API
+        self._id_to_slug: Dict[str, str] = {}
+        # Внешний HTTP клиент (например, с дисковым кэшем) не закрываем в close()
+        self._client: Optional[httpx.AsyncClient] = http_client
+        self._owns_client = http_client is None
+        # Ограничиваем число одновременных запросов к API (попадания в кэш не ограничиваются)
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+    
+    async def start(self):
+        """Открыть HTTP клиент (HTTP/2, пул постоянных соединений)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(
+                    max_connections=64,
+                    max_keepalive_connections=32,
+                    keepalive_expiry=60
+                ),
+                headers={
+                    "User-Agent": self.USER_AGENT
+                }
+            )
+    
+    async def close(self):
+        """Закрыть HTTP клиент"""
+        if self._client and self._owns_client:
+            await self._client.aclose()
+            self._client = None
     
     async def __aenter__(self):
         """Асинхронный контекстный менеджер - вход"""
-        self._client = httpx.AsyncClient(
-            timeout=httpx.Timeout(30.0),
-            headers={
-                "User-Agent": "MinecraftModManager/1.0.0 (https://github.com/user/minecraft-mod-manager)"
-            }
-        )
+        await self.start()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Асинхронный контекстный менеджер - выход"""
-        if self._client:
-            await self._client.aclose()
+        await self.close()
     
-    def _get_cache_key(self, endpoint: str, params: Dict = None) -> str:
-        """Создать ключ кэша"""
-        if params:
-            param_str = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
-            return f"{endpoint}?{param_str}"
-        return endpoint
-    
-    def _is_cache_valid(self, timestamp: datetime) -> bool:
-        """Проверить актуальность кэша"""
-        return datetime.now() - timestamp < timedelta(seconds=self.cache_ttl)
+    def _get_cache_key(self, endpoint: str, params: Dict = None) -> CacheKey:
+        """Создать ключ кэша (кортеж хэшируется быстрее, чем собранная строка)"""
+        return (endpoint, tuple(sorted(params.items())) if params else ())
     
     async def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
         """Выполнить HTTP запрос с кэшированием"""
@@ -63,23 +141,43 @@ class ModrinthClient:
         cache_key = self._get_cache_key(endpoint, params)
         
         # Проверяем кэш
-        if cache_key in self._cache:
-            timestamp, data = self._cache[cache_key]
-            if self._is_cache_valid(timestamp):
-                logger.debug(f"Используем кэш для {cache_key}")
-                return data
+        data = self._cache.get(cache_key)
+        if data is not None:
+            logger.debug(f"Используем кэш для {endpoint}")
+            return data
+        
+        # Для устаревшей записи переспрашиваем API с If-None-Match
+        stale = self._etags.get(cache_key)
+        headers = {'If-None-Match': stale[0]} if stale else None
         
         # Выполняем запрос
         url = f"{self.BASE_URL}/{endpoint.lstrip('/')}"
         try:
             logger.debug(f"Запрос к API: {url}")
-            response = await self._client.get(url, params=params or {})
+            async with self._semaphore:
+                response = await self._get_with_retry(url, params or {}, headers)
+            
+            if response.status_code == 304 and stale:
+                # Данные не изменились - продлеваем кэш без разбора JSON
+                logger.debug(f"Данные не изменились для {endpoint}")
+                data = stale[1]
+                self._cache[cache_key] = data
+                return data
+            
             response.raise_for_status()
             
-            data = response.json()
+            # Крупные ответы разбираем в отдельном потоке, чтобы не блокировать цикл событий
+            content = response.content
+            if len(content) > self.THREADED_PARSE_THRESHOLD:
+                data = await asyncio.to_thread(_loads, content)
+            else:
+                data = _loads(content)
             
             # Сохраняем в кэш
-            self._cache[cache_key] = (datetime.now(), data)
+            self._cache[cache_key] = data
+            etag = response.headers.get('ETag')
+            if etag:
+                self._etags[cache_key] = (etag, data)
             
             return data
             
@@ -93,32 +191,53 @@ class ModrinthClient:
         except httpx.RequestError as e:
             raise ModrinthAPIError(f"Ошибка сети: {e}")
     
+    async def _get_with_retry(self, url: str, params: Dict,
+                              headers: Optional[Dict] = None) -> httpx.Response:
+        """Выполнить GET запрос, повторяя его при превышении лимита запросов (429)"""
+        for attempt in range(self.retry_attempts + 1):
+            response = await self._client.get(url, params=params, headers=headers)
+            if response.status_code != 429 or attempt == self.retry_attempts:
+                return response
+            
+            delay = self._get_retry_delay(response, attempt)
+            logger.warning(f"Превышен лимит запросов к API, повтор через {delay:.1f} с")
+            await asyncio.sleep(delay)
+    
+    def _get_retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Задержка перед повтором: Retry-After или экспоненциальная"""
+        retry_after = response.headers.get('Retry-After')
+        try:
+            delay = float(retry_after) if retry_after else 2 ** attempt
+        except ValueError:
+            delay = 2 ** attempt
+        return min(max(delay, 0.0), self.MAX_RETRY_DELAY)
+    
     def extract_slug_from_url(self, url_or_slug: str) -> str:
         """Извлечь slug из URL или вернуть как есть"""
-        # Если это уже slug (без протокола и доменов)
-        if not url_or_slug.startswith(('http://', 'https://')):
-            return url_or_slug.strip()
-        
-        # Парсим URL
-        try:
-            parsed = urlparse(url_or_slug)
-            if 'modrinth.com' not in parsed.netloc:
-                raise ModrinthAPIError(f"Неподдерживаемый URL: {url_or_slug}")
-            
-            # Извлекаем slug из пути
-            path_parts = parsed.path.strip('/').split('/')
-            if len(path_parts) >= 2 and path_parts[0] == 'mod':
-                return path_parts[1]
-            
-            raise ModrinthAPIError(f"Не удалось извлечь slug из URL: {url_or_slug}")
-            
-        except Exception as e:
-            raise ModrinthAPIError(f"Ошибка парсинга URL: {e}")
+        return _extract_slug(url_or_slug)
     
     async def get_project(self, slug: str) -> Dict:
         """Получить информацию о проекте"""
         slug = self.extract_slug_from_url(slug)
-        return await self._make_request(f"project/{slug}")
+        project = await self._make_request(f"project/{slug}")
+        self._remember_project(project)
+        return project
+    
+    async def get_projects(self, ids: List[str]) -> List[Dict]:
+        """Получить несколько проектов одним запросом"""
+        projects = await self._make_request("projects", {'ids': _dumps_param(ids)})
+        for project in projects:
+            self._remember_project(project)
+        return projects
+    
+    def _remember_project(self, project: Dict):
+        """Запомнить соответствие id -> slug и закэшировать проект под обоими ключами"""
+        project_id = project.get('id')
+        project_slug = project.get('slug')
+        if project_id and project_slug:
+            self._id_to_slug[project_id] = project_slug
+            for key in (project_id, project_slug):
+                self._cache[self._get_cache_key(f"project/{key}")] = project
     
     async def get_project_versions(self, slug: str, 
                                  game_versions: List[str] = None,
@@ -128,9 +247,9 @@ class ModrinthClient:
         
         params = {}
         if game_versions:
-            params['game_versions'] = json.dumps(game_versions)
+            params['game_versions'] = _dumps_param(game_versions)
         if loaders:
-            params['loaders'] = json.dumps(loaders)
+            params['loaders'] = _dumps_param(loaders)
         
         return await self._make_request(f"project/{slug}/version", params)
     
@@ -149,48 +268,58 @@ class ModrinthClient:
         }
         
         if categories:
-            params['categories'] = json.dumps(categories)
+            params['categories'] = _dumps_param(categories)
         if versions:
-            params['versions'] = json.dumps(versions)
+            params['versions'] = _dumps_param(versions)
         
         return await self._make_request("search", params)
     
     def filter_compatible_versions(self, versions: List[Dict], 
                                  minecraft_version: str,
                                  mod_loader: ModLoader,
-                                 prefer_stable: bool = True) -> List[Dict]:
-        """Отфильтровать совместимые версии"""
-        compatible = []
+                                 prefer_stable: bool = True,
+                                 slug: Optional[str] = None) -> List[Dict]:
+        """Отфильтровать совместимые версии (с указанием slug результат кэшируется)"""
+        if slug is None:
+            return self._filter_compatible_versions(versions, minecraft_version, mod_loader, prefer_stable)
+        
+        # Списки версий живут в кэше ответов столько же, сколько этот результат
+        key = (slug, minecraft_version, mod_loader.value, prefer_stable, len(versions))
+        compatible = self._compat_cache.get(key)
+        if compatible is None:
+            compatible = self._filter_compatible_versions(versions, minecraft_version, mod_loader, prefer_stable)
+            self._compat_cache[key] = compatible
+        return compatible
+    
+    def _filter_compatible_versions(self, versions: List[Dict],
+                                    minecraft_version: str,
+                                    mod_loader: ModLoader,
+                                    prefer_stable: bool) -> List[Dict]:
+        """Отфильтровать и отсортировать совместимые версии"""
+        loader = mod_loader.value
         
+        # Один проход: (приоритет типа, дата публикации, версия) для совместимых версий
+        rows = []
         for version in versions:
-            # Проверяем совместимость с версией Minecraft
-            if minecraft_version not in version.get('game_versions', []):
+            if (minecraft_version not in version.get('game_versions', ())
+                    or loader not in version.get('loaders', ())):
                 continue
-            
-            # Проверяем совместимость с загрузчиком
-            loaders = version.get('loaders', [])
-            if mod_loader.value not in loaders:
-                continue
-            
-            compatible.append(version)
+            priority = _VERSION_PRIORITY.get(version.get('version_type', 'release'), 3)
+            rows.append((priority, version.get('date_published', ''), version))
         
-        if not compatible:
+        if not rows:
             return []
         
-        # Сортируем по приоритету: release > beta > alpha
-        def version_priority(v):
-            version_type = v.get('version_type', 'release')
-            priority_map = {'release': 0, 'beta': 1, 'alpha': 2}
-            return priority_map.get(version_type, 3)
-        
         if prefer_stable:
-            # Сначала пробуем найти стабильные версии
-            stable_versions = [v for v in compatible if v.get('version_type') == 'release']
-            if stable_versions:
-                return sorted(stable_versions, key=lambda x: x.get('date_published', ''), reverse=True)
+            # Сначала пробуем найти стабильные версии; версия без типа стабильной не считается
+            stable_rows = [row for row in rows if row[2].get('version_type') == 'release']
+            if stable_rows:
+                stable_rows.sort(key=itemgetter(1), reverse=True)
+                return [row[2] for row in stable_rows]
         
         # Если стабильных нет или не требуем стабильные, возвращаем все отсортированные
-        return sorted(compatible, key=lambda x: (version_priority(x), x.get('date_published', '')), reverse=True)
+        rows.sort(key=itemgetter(0, 1), reverse=True)
+        return [row[2] for row in rows]
     
     def get_primary_file(self, version: Dict) -> Optional[Dict]:
         """Получить основной файл версии"""
@@ -198,18 +327,16 @@ class ModrinthClient:
         if not files:
             return None
         
-        # Ищем primary файл
+        # Один проход: primary файл сразу возвращаем, попутно запоминаем первый .jar
+        first_jar = None
         for file in files:
             if file.get('primary', False):
                 return file
+            if first_jar is None and file.get('filename', '').endswith('.jar'):
+                first_jar = file
         
-        # Если primary не найден, берем первый .jar файл
-        for file in files:
-            if file.get('filename', '').endswith('.jar'):
-                return file
-        
-        # В крайнем случае берем первый файл
-        return files[0]
+        # Если primary не найден, берем первый .jar файл, в крайнем случае - первый файл
+        return first_jar or files[0]
     
     async def resolve_dependencies(self, project_slug: str, 
                                  minecraft_version: str,
@@ -226,16 +353,18 @@ class ModrinthClient:
         dependencies = []
         
         try:
-            # Получаем информацию о проекте
-            project = await self.get_project(project_slug)
-            versions = await self.get_project_versions(
-                project_slug, 
-                game_versions=[minecraft_version],
-                loaders=[mod_loader.value]
+            # Получаем информацию о проекте и его версии параллельно
+            project, versions = await asyncio.gather(
+                self.get_project(project_slug),
+                self.get_project_versions(
+                    project_slug, 
+                    game_versions=[minecraft_version],
+                    loaders=[mod_loader.value]
+                )
             )
             
             compatible_versions = self.filter_compatible_versions(
-                versions, minecraft_version, mod_loader
+                versions, minecraft_version, mod_loader, slug=project_slug
             )
             
             if not compatible_versions:
@@ -251,30 +380,55 @@ class ModrinthClient:
                 'file': self.get_primary_file(latest_version)
             })
             
-            # Обрабатываем зависимости этого проекта
-            for dep in latest_version.get('dependencies', []):
-                dep_type = dep.get('dependency_type')
-                if dep_type in ['required', 'optional']:  # Обрабатываем обязательные и опциональные
-                    dep_project_id = dep.get('project_id')
-                    if dep_project_id:
-                        try:
-                            # Получаем slug по project_id
-                            dep_project = await self.get_project(dep_project_id)
-                            dep_slug = dep_project.get('slug')
-                            
-                            if dep_slug and dep_slug not in resolved:
-                                sub_deps = await self.resolve_dependencies(
-                                    dep_slug, minecraft_version, mod_loader, resolved
-                                )
-                                dependencies.extend(sub_deps)
-                        except ModrinthAPIError as e:
-                            logger.warning(f"Не удалось разрешить зависимость {dep_project_id}: {e}")
+            # Обрабатываем обязательные и опциональные зависимости этого проекта параллельно
+            dep_project_ids = [
+                dep['project_id'] for dep in latest_version.get('dependencies', [])
+                if dep.get('dependency_type') in ('required', 'optional') and dep.get('project_id')
+            ]
+            
+            # Неизвестные проекты получаем одним запросом, дальше slug берется из _id_to_slug
+            unknown_ids = [dep_id for dep_id in dep_project_ids if dep_id not in self._id_to_slug]
+            if len(unknown_ids) > 1:
+                try:
+                    await self.get_projects(unknown_ids)
+                except ModrinthAPIError as e:
+                    logger.warning(f"Не удалось получить зависимости {project_slug} одним запросом: {e}")
+            
+            sub_results = await asyncio.gather(*(
+                self._resolve_dependency(dep_project_id, minecraft_version, mod_loader, resolved)
+                for dep_project_id in dep_project_ids
+            ))
+            for sub_deps in sub_results:
+                dependencies.extend(sub_deps)
             
         except ModrinthAPIError as e:
             logger.error(f"Ошибка при разрешении зависимостей для {project_slug}: {e}")
         
         return dependencies
     
+    async def _resolve_dependency(self, dep_project_id: str,
+                                  minecraft_version: str,
+                                  mod_loader: ModLoader,
+                                  resolved: set) -> List[Dict]:
+        """Разрешить одну зависимость по project_id"""
+        try:
+            # Получаем slug по project_id (без запроса, если проект уже встречался)
+            dep_slug = self._id_to_slug.get(dep_project_id)
+            if dep_slug is None:
+                dep_project = await self.get_project(dep_project_id)
+                dep_slug = dep_project.get('slug')
+            
+            # Проверка и добавление в resolved выполняются без await между ними,
+            # поэтому параллельные ветки не разрешают один проект дважды
+            if dep_slug and dep_slug not in resolved:
+                return await self.resolve_dependencies(
+                    dep_slug, minecraft_version, mod_loader, resolved
+                )
+        except ModrinthAPIError as e:
+            logger.warning(f"Не удалось разрешить зависимость {dep_project_id}: {e}")
+        
+        return []
+    
     async def download_file(self, file_info: Dict, destination_path: str) -> bool:
         """Скачать файл"""
         if not self._client:
@@ -287,12 +441,36 @@ class ModrinthClient:
         try:
             logger.info(f"Скачивание файла: {file_info.get('filename')}")
             
+            # Хэш считаем во время скачивания, чтобы не перечитывать файл
+            expected_sha1 = (file_info.get('hashes') or {}).get('sha1')
+            sha1 = hashlib.sha1() if expected_sha1 else None
+            
             async with self._client.stream('GET', url) as response:
                 response.raise_for_status()
                 
-                with open(destination_path, 'wb') as f:
-                    async for chunk in response.aiter_bytes():
-                        f.write(chunk)
+                # aiofiles не блокирует цикл событий на записи на диск
+                async with aiofiles.open(destination_path, 'wb') as f:
+                    content_length = response.headers.get('Content-Length')
+                    if content_length and content_length.isdigit() and hasattr(os, 'posix_fallocate'):
+                        try:
+                            os.posix_fallocate(f.fileno(), 0, int(content_length))
+                        except OSError:
+                            pass  # Файловая система не поддерживает предвыделение
+                    
+                    bytes_written = 0
+                    async for chunk in response.aiter_bytes(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        if sha1:
+                            sha1.update(chunk)
+                        await f.write(chunk)
+                        bytes_written += len(chunk)
+                    
+                    # Content-Length - размер в сжатом виде, поэтому обрезаем предвыделенный хвост
+                    await f.truncate(bytes_written)
+            
+            if sha1 and sha1.hexdigest() != expected_sha1:
+                logger.error(f"Хэш файла не совпадает: {file_info.get('filename')}")
+                os.remove(destination_path)
+                return False
             
             logger.info(f"Файл успешно скачан: {destination_path}")
             return True
@@ -304,8 +482,7 @@ class ModrinthClient:
     def clear_cache(self):
         """Очистить кэш"""
         self._cache.clear()
+        self._etags.clear()
+        self._compat_cache.clear()
         logger.debug("Кэш API очищен")
 
-
-# Импорт json для использования в методах
-import json
\ No newline at end of file
@@ -4,15 +4,17 @@
 
 import asyncio
 import logging
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Deque, Dict, List, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 
 from app.config import Settings
 from app.mod_manager import ModManager
-from app.models import UpdateLogEntry
+from app.models import ModInfo, UpdateLogEntry, UpdateResult
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +24,8 @@ class UpdateLogger:
     
     def __init__(self, max_entries: int = 1000):
         self.max_entries = max_entries
-        self._logs: List[UpdateLogEntry] = []
+        # deque сам отбрасывает старые записи при переполнении
+        self._logs: Deque[UpdateLogEntry] = deque(maxlen=max_entries)
     
     def add_log(self, mod_slug: str, old_version: Optional[str], 
                 new_version: str, status: str, message: Optional[str] = None):
@@ -38,18 +41,22 @@ class UpdateLogger:
         
         self._logs.append(entry)
         
-        # Ограничиваем количество записей
-        if len(self._logs) > self.max_entries:
-            self._logs = self._logs[-self.max_entries:]
-        
         logger.info(f"Лог обновления: {mod_slug} {old_version} -> {new_version} ({status})")
     
     def get_logs(self, limit: Optional[int] = None) -> List[UpdateLogEntry]:
         """Получить логи обновлений"""
-        logs = sorted(self._logs, key=lambda x: x.timestamp, reverse=True)
-        if limit:
-            return logs[:limit]
-        return logs
+        # Записи добавляются в хронологическом порядке - новые в конце
+        if limit is not None:
+            return list(islice(reversed(self._logs), limit))
+        return list(reversed(self._logs))
+    
+    def trim(self, keep: int) -> int:
+        """Оставить только последние keep записей, вернуть число удаленных"""
+        removed = 0
+        while len(self._logs) > keep:
+            self._logs.popleft()
+            removed += 1
+        return removed
     
     def clear_logs(self):
         """Очистить логи"""
@@ -142,53 +149,18 @@ class AutoUpdater:
             
             logger.info(f"Проверяем обновления для {len(auto_update_mods)} модов")
             
-            updated_count = 0
-            failed_count = 0
+            # Проверяем моды параллельно, ограничивая число одновременных проверок
+            semaphore = asyncio.Semaphore(max(1, self.settings.update_concurrency))
+            tasks = [self._update_one(mod, semaphore) for mod in auto_update_mods]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            # Обновляем моды по одному
-            for mod in auto_update_mods:
-                try:
-                    old_version = mod.version
-                    success = await self.mod_manager.update_mod(mod.slug)
-                    
-                    if success:
-                        # Получаем новую версию
-                        updated_mod = self.mod_manager.state_manager.get_mod(mod.slug)
-                        new_version = updated_mod.version if updated_mod else "unknown"
-                        
-                        if new_version != old_version:
-                            self.update_logger.add_log(
-                                mod.slug, old_version, new_version, "success",
-                                "Мод успешно обновлен"
-                            )
-                            updated_count += 1
-                            logger.info(f"Мод обновлен: {mod.slug} {old_version} -> {new_version}")
-                        else:
-                            self.update_logger.add_log(
-                                mod.slug, old_version, old_version, "skipped",
-                                "Мод уже актуален"
-                            )
-                    else:
-                        self.update_logger.add_log(
-                            mod.slug, old_version, old_version, "failed",
-                            "Не удалось обновить мод"
-                        )
-                        failed_count += 1
-                
-                except Exception as e:
-                    logger.error(f"Ошибка обновления мода {mod.slug}: {e}")
-                    self.update_logger.add_log(
-                        mod.slug, mod.version, mod.version, "failed",
-                        f"Ошибка: {str(e)}"
-                    )
-                    failed_count += 1
-                
-                # Небольшая пауза между обновлениями
-                await asyncio.sleep(1)
+            # Обновляем время последней проверки в состоянии; запись идет в отдельном потоке
+            state_manager = self.mod_manager.state_manager
+            async with state_manager.batch_async():
+                state_manager.set_metadata('last_update_check', self._last_check.isoformat())
             
-            # Обновляем время последней проверки в состоянии
-            self.mod_manager.state_manager._state['metadata']['last_update_check'] = self._last_check.isoformat()
-            self.mod_manager.state_manager._save_state()
+            updated_count = sum(1 for result in results if result == "success")
+            failed_count = sum(1 for result in results if result == "failed" or isinstance(result, BaseException))
             
             logger.info(f"Проверка обновлений завершена: обновлено {updated_count}, ошибок {failed_count}")
             
@@ -197,13 +169,51 @@ class AutoUpdater:
         finally:
             self._update_in_progress = False
     
+    async def _update_one(self, mod: ModInfo, semaphore: asyncio.Semaphore) -> str:
+        """Обновить один мод и записать результат в лог обновлений"""
+        async with semaphore:
+            try:
+                old_version = mod.version
+                result = await self.mod_manager.update_mod(mod.slug)
+                
+                if result == UpdateResult.UPDATED:
+                    # Получаем новую версию
+                    updated_mod = self.mod_manager.state_manager.get_mod(mod.slug)
+                    new_version = updated_mod.version if updated_mod else "unknown"
+                    
+                    self.update_logger.add_log(
+                        mod.slug, old_version, new_version, "success",
+                        "Мод успешно обновлен"
+                    )
+                    logger.info(f"Мод обновлен: {mod.slug} {old_version} -> {new_version}")
+                    return "success"
+                
+                if result in (UpdateResult.UP_TO_DATE, UpdateResult.SKIPPED):
+                    message = "Мод уже актуален" if result == UpdateResult.UP_TO_DATE else "Мод недавно проверялся"
+                    self.update_logger.add_log(
+                        mod.slug, old_version, old_version, "skipped", message
+                    )
+                    return "skipped"
+                
+                self.update_logger.add_log(
+                    mod.slug, old_version, old_version, "failed",
+                    "Не удалось обновить мод"
+                )
+                return "failed"
+            
+            except Exception as e:
+                logger.error(f"Ошибка обновления мода {mod.slug}: {e}")
+                self.update_logger.add_log(
+                    mod.slug, mod.version, mod.version, "failed",
+                    f"Ошибка: {str(e)}"
+                )
+                return "failed"
+    
     async def _cleanup_logs(self):
         """Очистка старых логов"""
         try:
             # Оставляем только последние 500 записей
-            logs = self.update_logger.get_logs()
-            if len(logs) > 500:
-                self.update_logger._logs = logs[:500]
+            if self.update_logger.trim(500):
                 logger.info(f"Очищены старые логи, оставлено {len(self.update_logger._logs)} записей")
         except Exception as e:
             logger.error(f"Ошибка очистки логов: {e}")
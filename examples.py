@@ -5,23 +5,88 @@
 
 import asyncio
 import httpx
-import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+try:
+    import orjson
+    
+    def _dumps(data: Any) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+except ImportError:  # orjson необязателен, используем stdlib json
+    import json
+    
+    def _dumps(data: Any) -> str:
+        return json.dumps(data, indent=2, ensure_ascii=False)
+
+# Шаблоны строк списков: format_map берет значения прямо из словаря ответа
+_MOD_LINE = "   - {name} v{version}".format_map
+_LOG_LINE = "   - {timestamp}: {mod_slug} {old_version} -> {new_version} ({status})".format_map
+
+# Тексты, которые main() выводит целиком
+_SEP = "=" * 50
+_MAIN_BANNER = "\n".join([
+    "📚 Примеры использования Minecraft Mod Manager API",
+    _SEP,
+    "",
+    "⚠️  Убедитесь, что сервер запущен: python run.py",
+    "   Нажмите Enter для продолжения или Ctrl+C для отмены...",
+])
+_INSTALL_PROMPT = "\n".join([
+    "",
+    _SEP,
+    "🤔 Хотите запустить пример установки популярных модов?",
+    "   Это установит несколько модов в ваш Minecraft сервер.",
+    "   Введите 'yes' для продолжения или любой другой текст для пропуска:",
+])
+_DONE_BANNER = "\n".join([
+    "",
+    _SEP,
+    "✅ Все примеры завершены!",
+    "📖 Больше информации в README.md",
+])
+
+async def _attach_error_data(response: httpx.Response):
+    """Разобрать тело ответа с ошибкой один раз и сохранить в response.error_data"""
+    response.error_data = None
+    if response.status_code >= 400:
+        await response.aread()
+        try:
+            response.error_data = response.json()
+        except ValueError:
+            pass
 
 class ModManagerClient:
     """Простой клиент для работы с Minecraft Mod Manager API"""
     
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url.rstrip('/')
+        # Один клиент на все запросы: соединения переиспользуются,
+        # а по HTTPS параллельные запросы мультиплексируются через HTTP/2
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+            event_hooks={"response": [_attach_error_data]}
+        )
+    
+    async def close(self):
+        """Закрыть HTTP клиент"""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        """Асинхронный контекстный менеджер - вход"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Асинхронный контекстный менеджер - выход"""
+        await self.close()
     
     async def _request(self, method: str, endpoint: str, **kwargs) -> Dict[Any, Any]:
         """Выполнить HTTP запрос"""
-        url = f"{self.base_url}{endpoint}"
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.request(method, endpoint, **kwargs)
+        response.raise_for_status()
+        return response.json()
     
     async def health_check(self) -> Dict[Any, Any]:
         """Проверка состояния сервиса"""
@@ -40,9 +105,29 @@ class ModManagerClient:
         }
         return await self._request("POST", "/install", json=data)
     
-    async def get_mods(self) -> Dict[Any, Any]:
-        """Получить список установленных модов"""
-        return await self._request("GET", "/mods")
+    async def install_mods(self, mods: List[str], force_update: bool = False,
+                           auto_update: bool = True) -> Dict[Any, Any]:
+        """Установить несколько модов одним запросом"""
+        data = {
+            "mods": [
+                {"mod": mod, "force_update": force_update, "auto_update": auto_update}
+                for mod in mods
+            ]
+        }
+        return await self._request("POST", "/install/batch", json=data)
+    
+    async def get_mods(self, limit: Optional[int] = None, offset: int = 0) -> Dict[Any, Any]:
+        """Получить список установленных модов (по умолчанию - все)"""
+        params = {}
+        if limit is not None:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+        return await self._request("GET", "/mods", params=params)
+    
+    async def get_mod(self, mod_slug: str) -> Dict[Any, Any]:
+        """Получить информацию об установленном моде"""
+        return await self._request("GET", f"/mods/{mod_slug}")
     
     async def remove_mod(self, mod_slug: str) -> Dict[Any, Any]:
         """Удалить мод"""
@@ -77,56 +162,65 @@ def print_json(data: Dict[Any, Any], title: str = ""):
     if title:
         print(f"\n📋 {title}")
         print("=" * (len(title) + 4))
-    print(json.dumps(data, indent=2, ensure_ascii=False))
+    print(_dumps(data))
 
-async def example_basic_usage():
+async def example_basic_usage(client: ModManagerClient):
     """Пример базового использования"""
     print("🚀 Пример базового использования Minecraft Mod Manager")
     
-    client = ModManagerClient()
-    
-    try:
-        # 1. Проверка состояния сервиса
-        print("\n1️⃣ Проверка состояния сервиса...")
-        health = await client.health_check()
+    # Все четыре запроса независимы - выполняем их одновременно
+    health, server_info, mods, auto_status = await asyncio.gather(
+        client.health_check(),
+        client.get_server_info(),
+        client.get_mods(limit=5),  # Показываем первые 5
+        client.get_auto_update_status(),
+        return_exceptions=True
+    )
+    
+    # 1. Проверка состояния сервиса
+    print("\n1️⃣ Проверка состояния сервиса...")
+    if isinstance(health, Exception):
+        print(f"❌ Ошибка: {health}")
+    else:
         print(f"   Статус: {health['status']}")
         print(f"   Время работы: {health['uptime']:.1f}s")
         print(f"   Modrinth API: {'✅' if health['modrinth_api_accessible'] else '❌'}")
-        
-        # 2. Информация о сервере
-        print("\n2️⃣ Получение информации о сервере...")
-        server_info = await client.get_server_info()
+    
+    # 2. Информация о сервере
+    print("\n2️⃣ Получение информации о сервере...")
+    if isinstance(server_info, Exception):
+        print(f"❌ Ошибка: {server_info}")
+    else:
         print(f"   Minecraft: {server_info['minecraft_version']}")
         print(f"   Загрузчик: {server_info['mod_loader']}")
         print(f"   Установлено модов: {server_info['mods_count']}")
-        
-        # 3. Список установленных модов
-        print("\n3️⃣ Список установленных модов...")
-        mods = await client.get_mods()
+    
+    # 3. Список установленных модов
+    print("\n3️⃣ Список установленных модов...")
+    if isinstance(mods, Exception):
+        print(f"❌ Ошибка: {mods}")
+    else:
         print(f"   Всего модов: {mods['total']}")
         
         if mods['mods']:
             print("   Установленные моды:")
-            for mod in mods['mods'][:5]:  # Показываем первые 5
-                print(f"   - {mod['name']} v{mod['version']}")
-        
-        # 4. Статус автообновления
-        print("\n4️⃣ Статус автообновления...")
-        auto_status = await client.get_auto_update_status()
+            for mod in mods['mods']:
+                print(_MOD_LINE(mod))
+    
+    # 4. Статус автообновления
+    print("\n4️⃣ Статус автообновления...")
+    if isinstance(auto_status, Exception):
+        print(f"❌ Ошибка: {auto_status}")
+    else:
         print(f"   Включено: {'✅' if auto_status['enabled'] else '❌'}")
         print(f"   Интервал: {auto_status['interval_hours']} ч.")
         if auto_status.get('last_check'):
             print(f"   Последняя проверка: {auto_status['last_check']}")
-        
-    except Exception as e:
-        print(f"❌ Ошибка: {e}")
 
-async def example_install_popular_mods():
+async def example_install_popular_mods(client: ModManagerClient):
     """Пример установки популярных модов"""
     print("\n🔧 Пример установки популярных модов")
     
-    client = ModManagerClient()
-    
     # Список популярных модов для Fabric
     popular_mods = [
         "sodium",           # Оптимизация рендеринга
@@ -136,37 +230,35 @@ async def example_install_popular_mods():
         "modmenu",          # Меню модов
     ]
     
-    for i, mod in enumerate(popular_mods, 1):
-        try:
-            print(f"\n{i}️⃣ Установка мода: {mod}")
-            result = await client.install_mod(mod)
-            
-            if result['status'] == 'success':
-                print(f"   ✅ Успешно установлено:")
-                for installed in result['installed']:
-                    print(f"      + {installed}")
-                for updated in result['updated']:
-                    print(f"      ↗️ {updated} (обновлен)")
-                for skipped in result['skipped']:
-                    print(f"      ⏭️ {skipped} (пропущен)")
-            else:
-                print(f"   ❌ Ошибка: {result.get('message', 'Неизвестная ошибка')}")
-                
-        except Exception as e:
-            print(f"   ❌ Ошибка установки {mod}: {e}")
+    # Устанавливаем все моды одним запросом - сервер обрабатывает их параллельно
+    try:
+        results = (await client.install_mods(popular_mods))['results']
+    except Exception as e:
+        print(f"   ❌ Ошибка пакетной установки: {e}")
+        return
+    
+    # Выводим результаты в исходном порядке
+    for i, (mod, result) in enumerate(zip(popular_mods, results), 1):
+        print(f"\n{i}️⃣ Установка мода: {mod}")
         
-        # Небольшая пауза между установками
-        await asyncio.sleep(1)
+        if result['status'] == 'success':
+            print(f"   ✅ Успешно установлено:")
+            for installed in result['installed']:
+                print(f"      + {installed}")
+            for updated in result['updated']:
+                print(f"      ↗️ {updated} (обновлен)")
+            for skipped in result['skipped']:
+                print(f"      ⏭️ {skipped} (пропущен)")
+        else:
+            print(f"   ❌ Ошибка: {result.get('message', 'Неизвестная ошибка')}")
 
-async def example_mod_management():
+async def example_mod_management(client: ModManagerClient):
     """Пример управления модами"""
     print("\n🔄 Пример управления модами")
     
-    client = ModManagerClient()
-    
     try:
         # Получаем список модов
-        mods = await client.get_mods()
+        mods = await client.get_mods(limit=1)
         
         if not mods['mods']:
             print("   Нет установленных модов для демонстрации")
@@ -185,8 +277,12 @@ async def example_mod_management():
         
         # 2. Получение обновленной информации
         print(f"\n2️⃣ Получение обновленной информации...")
-        updated_mods = await client.get_mods()
-        updated_mod = next((m for m in updated_mods['mods'] if m['slug'] == mod_slug), None)
+        try:
+            updated_mod = await client.get_mod(mod_slug)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            updated_mod = None
         
         if updated_mod:
             print(f"   Текущая версия: {updated_mod['version']}")
@@ -200,27 +296,28 @@ async def example_mod_management():
     except Exception as e:
         print(f"❌ Ошибка управления модами: {e}")
 
-async def example_auto_update_management():
+async def example_auto_update_management(client: ModManagerClient):
     """Пример управления автообновлениями"""
     print("\n⚙️ Пример управления автообновлениями")
     
-    client = ModManagerClient()
-    
     try:
+        # Статус и логи независимы - запрашиваем одновременно
+        status, logs = await asyncio.gather(
+            client.get_auto_update_status(),
+            client.get_update_logs(limit=10)
+        )
+        
         # 1. Получаем текущий статус
         print("\n1️⃣ Текущий статус автообновления...")
-        status = await client.get_auto_update_status()
         print_json(status, "Статус автообновления")
         
         # 2. Получаем логи обновлений
         print("\n2️⃣ Последние логи обновлений...")
-        logs = await client.get_update_logs(limit=10)
         
         if logs['logs']:
             print(f"   Найдено {logs['total']} записей в логах:")
             for log in logs['logs'][:5]:  # Показываем первые 5
-                print(f"   - {log['timestamp']}: {log['mod_slug']} "
-                      f"{log['old_version']} -> {log['new_version']} ({log['status']})")
+                print(_LOG_LINE(log))
         else:
             print("   Логи обновлений пусты")
         
@@ -243,12 +340,10 @@ async def example_auto_update_management():
     except Exception as e:
         print(f"❌ Ошибка управления автообновлениями: {e}")
 
-async def example_error_handling():
+async def example_error_handling(client: ModManagerClient):
     """Пример обработки ошибок"""
     print("\n🚨 Пример обработки ошибок")
     
-    client = ModManagerClient()
-    
     # 1. Попытка установить несуществующий мод
     print("\n1️⃣ Попытка установить несуществующий мод...")
     try:
@@ -256,10 +351,11 @@ async def example_error_handling():
         print(f"   Неожиданный успех: {result}")
     except httpx.HTTPStatusError as e:
         print(f"   ✅ Ожидаемая ошибка HTTP {e.response.status_code}")
-        try:
-            error_data = e.response.json()
+        # Тело ошибки уже разобрано хуком _attach_error_data
+        error_data = e.response.error_data
+        if isinstance(error_data, dict):
             print(f"   Сообщение: {error_data.get('message', 'Нет сообщения')}")
-        except:
+        else:
             print(f"   Текст ошибки: {e.response.text}")
     except Exception as e:
         print(f"   ❌ Неожиданная ошибка: {e}")
@@ -276,60 +372,53 @@ async def example_error_handling():
     
     # 3. Проверка недоступного сервера
     print("\n3️⃣ Проверка недоступного сервера...")
-    offline_client = ModManagerClient("http://localhost:9999")  # Неправильный порт
-    
-    try:
-        result = await offline_client.health_check()
-        print(f"   Неожиданный успех: {result}")
-    except httpx.ConnectError:
-        print("   ✅ Ожидаемая ошибка подключения")
-    except Exception as e:
-        print(f"   ❌ Неожиданная ошибка: {e}")
+    async with ModManagerClient("http://localhost:9999") as offline_client:  # Неправильный порт
+        try:
+            result = await offline_client.health_check()
+            print(f"   Неожиданный успех: {result}")
+        except httpx.ConnectError:
+            print("   ✅ Ожидаемая ошибка подключения")
+        except Exception as e:
+            print(f"   ❌ Неожиданная ошибка: {e}")
 
 async def main():
     """Главная функция с примерами"""
-    print("📚 Примеры использования Minecraft Mod Manager API")
-    print("=" * 50)
-    
-    print("\n⚠️  Убедитесь, что сервер запущен: python run.py")
-    print("   Нажмите Enter для продолжения или Ctrl+C для отмены...")
+    print(_MAIN_BANNER)
     
     try:
+        # Блокирующий ввод здесь допустим: пока ждем пользователя, других задач нет
         input()
     except KeyboardInterrupt:
         print("\n👋 Отменено пользователем")
         return
     
-    # Запускаем примеры
-    await example_basic_usage()
-    await asyncio.sleep(2)
-    
-    await example_auto_update_management()
-    await asyncio.sleep(2)
-    
-    await example_error_handling()
-    await asyncio.sleep(2)
-    
-    # Спрашиваем про установку модов
-    print("\n" + "=" * 50)
-    print("🤔 Хотите запустить пример установки популярных модов?")
-    print("   Это установит несколько модов в ваш Minecraft сервер.")
-    print("   Введите 'yes' для продолжения или любой другой текст для пропуска:")
-    
-    try:
-        response = input().strip().lower()
-        if response == 'yes':
-            await example_install_popular_mods()
-            await asyncio.sleep(2)
-            await example_mod_management()
-        else:
-            print("   ⏭️ Установка модов пропущена")
-    except KeyboardInterrupt:
-        print("\n👋 Отменено пользователем")
+    # Запускаем примеры на одном клиенте: все запросы идут через общий пул соединений
+    async with ModManagerClient() as client:
+        await example_basic_usage(client)
+        await example_auto_update_management(client)
+        await example_error_handling(client)
+        
+        # Спрашиваем про установку модов
+        print(_INSTALL_PROMPT)
+        
+        try:
+            response = input().strip().lower()
+            if response == 'yes':
+                await example_install_popular_mods(client)
+                await example_mod_management(client)
+            else:
+                print("   ⏭️ Установка модов пропущена")
+        except KeyboardInterrupt:
+            print("\n👋 Отменено пользователем")
     
-    print("\n" + "=" * 50)
-    print("✅ Все примеры завершены!")
-    print("📖 Больше информации в README.md")
+    print(_DONE_BANNER)
 
 if __name__ == "__main__":
+    # uvloop необязателен: без него используется стандартный цикл asyncio
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     asyncio.run(main())
\ No newline at end of file
@@ -28,20 +28,19 @@ def main():
         print(f"Ошибка: Файл конфигурации не найден: {args.config}")
         sys.exit(1)
     
-    # Устанавливаем переменные окружения если переданы аргументы
-    import os
-    if args.host:
-        os.environ['HOST'] = args.host
-    if args.port:
-        os.environ['PORT'] = str(args.port)
-    if args.log_level:
-        os.environ['LOG_LEVEL'] = args.log_level
+    # Аргументы командной строки передаем в настройки напрямую, не изменяя os.environ
+    overrides = {
+        key: value for key, value in (
+            ('host', args.host),
+            ('port', args.port),
+            ('log_level', args.log_level),
+        ) if value is not None
+    }
     
-    # Импортируем после установки переменных окружения
     from app.config import get_settings, config_manager
     
     try:
-        settings = get_settings()
+        settings = get_settings(overrides)
         
         # Проверяем конфигурацию
         errors = config_manager.validate_paths(settings)
@@ -71,13 +70,16 @@ def main():
         print(f"Автообновления: {'включены' if settings.enable_auto_update else 'отключены'}")
         print("Для остановки нажмите Ctrl+C")
         
+        # Передаем уже импортированное приложение: uvicorn не импортирует app.main повторно
+        # (строка "app.main:app" нужна только при reload=True)
         import uvicorn
+        from app.main import app, UVICORN_LOOP
         uvicorn.run(
-            "app.main:app",
+            app,
             host=settings.host,
             port=settings.port,
-            reload=False,
-            log_level=settings.log_level.lower()
+            log_level=settings.log_level.lower(),
+            loop=UVICORN_LOOP
         )
         
     except KeyboardInterrupt:
@@ -5,28 +5,62 @@
 
 import asyncio
 import json
+import os
 import tempfile
 from pathlib import Path
+from typing import Optional
 import httpx
 import sys
 
+try:
+    import orjson
+except ImportError:  # orjson необязателен, используем stdlib json
+    orjson = None
+
+# Подсказка о запуске API тестов
+_API_HINT = "\n".join([
+    "📡 Для тестирования API эндпоинтов запустите сервер:",
+    "   python run.py",
+    "   Затем в другом терминале:",
+    "   python test_basic.py --api-only",
+])
+
+# Дисковый кэш ответов Modrinth для test_modrinth_api (используется, если установлен hishel)
+# (во временной папке системы, чтобы не засорять рабочее дерево)
+MODRINTH_TEST_CACHE_DIR = Path(tempfile.gettempdir()) / "minecraft_mod_manager_test_cache" / "modrinth"
+MODRINTH_TEST_CACHE_TTL = 24 * 60 * 60
+
 async def test_api_endpoints():
     """Тестирование API эндпоинтов"""
     base_url = "http://localhost:8000"
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=10)
+    ) as client:
         print("🔍 Тестирование API эндпоинтов...")
         
+        # Эндпоинты независимы - опрашиваем их одновременно
+        health_response, info_response, mods_response, status_response = await asyncio.gather(
+            client.get("/health"),
+            client.get("/server/info"),
+            client.get("/mods"),
+            client.get("/auto-update/status"),
+            return_exceptions=True
+        )
+        
         # Тест health check
         try:
-            response = await client.get(f"{base_url}/health")
-            if response.status_code == 200:
-                health = response.json()
+            if isinstance(health_response, Exception):
+                raise health_response
+            if health_response.status_code == 200:
+                health = health_response.json()
                 print(f"✅ Health check: {health['status']}")
                 print(f"   Uptime: {health['uptime']:.1f}s")
                 print(f"   Modrinth API: {'✅' if health['modrinth_api_accessible'] else '❌'}")
             else:
-                print(f"❌ Health check failed: {response.status_code}")
+                print(f"❌ Health check failed: {health_response.status_code}")
                 return False
         except Exception as e:
             print(f"❌ Health check error: {e}")
@@ -34,35 +68,38 @@ async def test_api_endpoints():
         
         # Тест получения информации о сервере
         try:
-            response = await client.get(f"{base_url}/server/info")
-            if response.status_code == 200:
-                info = response.json()
+            if isinstance(info_response, Exception):
+                raise info_response
+            if info_response.status_code == 200:
+                info = info_response.json()
                 print(f"✅ Server info: Minecraft {info['minecraft_version']}, {info['mod_loader']}")
                 print(f"   Установлено модов: {info['mods_count']}")
             else:
-                print(f"❌ Server info failed: {response.status_code}")
+                print(f"❌ Server info failed: {info_response.status_code}")
         except Exception as e:
             print(f"❌ Server info error: {e}")
         
         # Тест получения списка модов
         try:
-            response = await client.get(f"{base_url}/mods")
-            if response.status_code == 200:
-                mods = response.json()
+            if isinstance(mods_response, Exception):
+                raise mods_response
+            if mods_response.status_code == 200:
+                mods = mods_response.json()
                 print(f"✅ Mods list: {mods['total']} модов")
             else:
-                print(f"❌ Mods list failed: {response.status_code}")
+                print(f"❌ Mods list failed: {mods_response.status_code}")
         except Exception as e:
             print(f"❌ Mods list error: {e}")
         
         # Тест статуса автообновления
         try:
-            response = await client.get(f"{base_url}/auto-update/status")
-            if response.status_code == 200:
-                status = response.json()
+            if isinstance(status_response, Exception):
+                raise status_response
+            if status_response.status_code == 200:
+                status = status_response.json()
                 print(f"✅ Auto-update status: {'включено' if status['enabled'] else 'отключено'}")
             else:
-                print(f"❌ Auto-update status failed: {response.status_code}")
+                print(f"❌ Auto-update status failed: {status_response.status_code}")
         except Exception as e:
             print(f"❌ Auto-update status error: {e}")
         
@@ -78,7 +115,7 @@ def test_configuration():
         settings = get_settings()
         print(f"✅ Конфигурация загружена")
         print(f"   Minecraft path: {settings.minecraft_root_path}")
-        print(f"   Mod loader: {settings.mod_loader}")
+        print(f"   Mod loader: {settings.mod_loader.value}")
         print(f"   Auto update: {settings.enable_auto_update}")
         
         # Проверяем пути
@@ -96,14 +133,33 @@ def test_configuration():
         print(f"❌ Ошибка конфигурации: {e}")
         return False
 
+def _create_modrinth_http_client() -> Optional[httpx.AsyncClient]:
+    """HTTP клиент с дисковым кэшем ответов Modrinth (None если hishel не установлен)"""
+    try:
+        import hishel
+    except ImportError:
+        return None
+    
+    from app.modrinth_api import ModrinthClient
+    
+    # Повторные запуски тестов читают ответы с диска, в том числе без сети
+    return hishel.AsyncCacheClient(
+        storage=hishel.AsyncFileStorage(base_path=MODRINTH_TEST_CACHE_DIR, ttl=MODRINTH_TEST_CACHE_TTL),
+        controller=hishel.Controller(force_cache=True, allow_stale=True),
+        timeout=30.0,
+        headers={"User-Agent": ModrinthClient.USER_AGENT}
+    )
+
 async def test_modrinth_api():
     """Тестирование Modrinth API"""
     print("🌐 Тестирование Modrinth API...")
     
+    http_client = None
     try:
         from app.modrinth_api import ModrinthClient
         
-        async with ModrinthClient() as client:
+        http_client = _create_modrinth_http_client()
+        async with ModrinthClient(http_client=http_client) as client:
             # Тест получения проекта
             project = await client.get_project("sodium")
             print(f"✅ Получен проект: {project['title']}")
@@ -117,67 +173,71 @@ async def test_modrinth_api():
     except Exception as e:
         print(f"❌ Ошибка Modrinth API: {e}")
         return False
+    finally:
+        if http_client is not None:
+            await http_client.aclose()
 
-def create_test_minecraft_server():
-    """Создать тестовый Minecraft сервер"""
+def create_test_minecraft_server(test_dir: Path) -> Path:
+    """Создать тестовый Minecraft сервер в папке test_dir"""
     print("🏗️  Создание тестового Minecraft сервера...")
-    
-    # Создаем временную папку
-    test_dir = Path(tempfile.mkdtemp(prefix="minecraft_test_"))
     print(f"   Тестовая папка: {test_dir}")
     
     # Создаем структуру папок
-    (test_dir / "mods").mkdir()
-    (test_dir / "logs").mkdir()
+    logs_dir = test_dir / "logs"
+    os.makedirs(test_dir / "mods", exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
     
-    # Создаем server.properties
-    server_properties = test_dir / "server.properties"
-    server_properties.write_text("minecraft-version=1.21.1\nserver-port=25565\n")
-    
-    # Создаем latest.log
-    latest_log = test_dir / "logs" / "latest.log"
-    latest_log.write_text("[INFO] Starting minecraft server version 1.21.1\n")
-    
-    # Создаем fabric файл для определения загрузчика
-    (test_dir / "fabric-server-mc.1.21.1.jar").touch()
+    # server.properties, latest.log и fabric файл для определения загрузчика
+    test_files = (
+        (test_dir / "server.properties", b"minecraft-version=1.21.1\nserver-port=25565\n"),
+        (logs_dir / "latest.log", b"[INFO] Starting minecraft server version 1.21.1\n"),
+        (test_dir / "fabric-server-mc.1.21.1.jar", b""),
+    )
+    for path, content in test_files:
+        path.write_bytes(content)
     
     print(f"✅ Тестовый сервер создан: {test_dir}")
     return test_dir
 
-def update_config_for_test(test_dir: Path):
+def _write_config_atomic(config_file: Path, payload: bytes):
+    """Записать config.json через временный файл и атомарную замену"""
+    tmp_file = config_file.with_name(config_file.name + ".tmp")
+    tmp_file.write_bytes(payload)
+    os.replace(tmp_file, config_file)
+
+def update_config_for_test(test_dir: Path) -> Optional[bytes]:
     """Обновить конфигурацию для тестирования"""
     print("⚙️  Обновление конфигурации для тестирования...")
     
-    # Обновляем config.json
+    # Запоминаем оригинальный config.json в памяти вместо переименования файла
     config_file = Path("config.json")
-    if config_file.exists():
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-    else:
-        config = {}
-    
-    # Создаем резервную копию
-    if config_file.exists():
-        backup_file = Path("config.json.backup")
-        config_file.rename(backup_file)
-        print(f"   Создана резервная копия: {backup_file}")
+    original = config_file.read_bytes() if config_file.exists() else None
+    config = json.loads(original) if original else {}
+    if original is not None:
+        print("   Оригинальная конфигурация сохранена в памяти")
     
     # Обновляем путь к тестовому серверу
     config["minecraft_root_path"] = str(test_dir)
     config["enable_auto_update"] = False  # Отключаем для тестов
     config["log_level"] = "DEBUG"
     
-    with open(config_file, 'w') as f:
-        json.dump(config, f, indent=2)
+    if orjson:
+        payload = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(config, indent=2).encode('utf-8')
+    _write_config_atomic(config_file, payload)
     
     print(f"✅ Конфигурация обновлена для тестирования")
-    return backup_file
+    return original
 
-def restore_config(backup_file: Path):
+def restore_config(original: Optional[bytes]):
     """Восстановить оригинальную конфигурацию"""
-    if backup_file and backup_file.exists():
-        backup_file.rename("config.json")
-        print("✅ Конфигурация восстановлена")
+    config_file = Path("config.json")
+    if original is not None:
+        _write_config_atomic(config_file, original)
+    elif config_file.exists():
+        config_file.unlink()
+    print("✅ Конфигурация восстановлена")
 
 async def main():
     """Основная функция тестирования"""
@@ -198,23 +258,19 @@ async def main():
     print()
     
     # Тест 3: Создание тестового сервера
-    test_server_dir = create_test_minecraft_server()
-    backup_config = update_config_for_test(test_server_dir)
-    
-    print()
-    
-    # Тест 4: API эндпоинты (требует запущенного сервера)
-    print("📡 Для тестирования API эндпоинтов запустите сервер:")
-    print("   python run.py")
-    print("   Затем в другом терминале:")
-    print("   python test_basic.py --api-only")
-    
-    # Восстанавливаем конфигурацию
-    restore_config(backup_config)
+    # (временная папка удаляется при выходе из with, даже если тест упал)
+    with tempfile.TemporaryDirectory(prefix="minecraft_test_") as tmp:
+        test_server_dir = create_test_minecraft_server(Path(tmp))
+        original_config = update_config_for_test(test_server_dir)
+        try:
+            print()
+            
+            # Тест 4: API эндпоинты (требует запущенного сервера)
+            print(_API_HINT)
+        finally:
+            # Восстанавливаем конфигурацию
+            restore_config(original_config)
     
-    # Удаляем тестовую папку
-    import shutil
-    shutil.rmtree(test_server_dir)
     print(f"🧹 Тестовая папка удалена: {test_server_dir}")
     
     print("\n✅ Базовые тесты завершены успешно!")
@@ -234,6 +290,13 @@ async def test_api_only():
     return success
 
 if __name__ == "__main__":
+    # uvloop необязателен: без него используется стандартный цикл asyncio
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     if len(sys.argv) > 1 and sys.argv[1] == "--api-only":
         success = asyncio.run(test_api_only())
     else: